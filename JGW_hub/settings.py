@@ -59,7 +59,8 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware'
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'jgw_api.middleware.AuthContextMiddleware'
 ]
 
 ROOT_URLCONF = 'JGW_hub.urls'
@@ -93,6 +94,28 @@ DATABASE_ROUTERS = [
     'JGW_hub.db_router.MultiDBRouter'
 ]
 
+# Cache
+# HUB_CACHE_LOCATION(redis 주소)가 있으면 worker끼리 공유하는 redis cache를 사용
+# 없다면 프로세스 단위 local memory cache 사용. 이 경우 응답 cache, registry의 version도 프로세스마다 따로 있어서
+# 다른 worker에서 바뀐 데이터를 알 수 없으므로, worker가 여러개인 운영 환경에서는 반드시 설정해야 한다 (jgw_api.W003)
+
+if os.environ.get('HUB_CACHE_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.environ['HUB_CACHE_LOCATION'],
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            }
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
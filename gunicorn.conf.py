@@ -0,0 +1,12 @@
+# gunicorn은 실행 위치의 gunicorn.conf.py를 자동으로 읽는다
+
+
+def post_worker_init(worker):
+    # fork 이후 worker 마다 설문 mongo 연결을 미리 맺어둔다
+    from jgw_api.survey_db import warm_up_survey_client
+    warm_up_survey_client()
+
+
+def worker_exit(server, worker):
+    from jgw_api.survey_db import close_survey_client
+    close_survey_client()
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core.checks import register, Tags
 
 
 class JgwApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jgw_api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .checks import check_survey_indexes, check_shared_cache
+        register(check_survey_indexes, Tags.database)
+        register(check_shared_cache, Tags.caches)
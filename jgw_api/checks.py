@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.checks import Warning
+
+from .survey_db import find_missing_survey_indexes
+
+
+def check_survey_indexes(app_configs, **kwargs):
+    '''
+    설문 collection에 선언된 index가 모두 있는지 확인하는 system check.
+    database 태그로 등록되어 migrate, check --database 실행 시에만 mongo에 접속한다.
+    '''
+    if not kwargs.get('databases'):
+        return []
+    try:
+        missing = find_missing_survey_indexes()
+    except Exception as e:
+        return [
+            Warning(
+                f'Could not verify survey indexes: {e}',
+                id='jgw_api.W001',
+            )
+        ]
+    return [
+        Warning(
+            f'Survey collection "{name}" is missing index "{index_name}".',
+            hint='Run "python manage.py survey_indexes".',
+            id='jgw_api.W002',
+        )
+        for name, index_name in missing
+    ]
+
+
+# 프로세스마다 따로 저장되는 cache backend
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def check_shared_cache(app_configs, **kwargs):
+    '''
+    운영 환경에서 worker끼리 공유하는 cache를 쓰는지 확인하는 system check.
+    응답 cache version, registry version이 프로세스마다 따로 있으면 다른 worker에서 바꾼 데이터를 알 수 없다.
+    '''
+    if settings.DEBUG or settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Warning(
+            'The default cache is local to each process, so other workers keep serving stale cached responses.',
+            hint='Set HUB_CACHE_LOCATION to a redis address shared by all workers.',
+            id='jgw_api.W003',
+        )
+    ]
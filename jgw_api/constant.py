@@ -9,6 +9,14 @@ BOARD_DEFAULT_PAGE_SIZE: Final = 10
 POST_MAX_PAGE_SIZE: Final = 100
 POST_MIN_PAGE_SIZE: Final = 1
 POST_DEFAULT_PAGE_SIZE: Final = 10
+# 게시글 목록에서 본문 대신 보여주는 요약 길이
+POST_EXCERPT_LENGTH: Final = 500
+POST_EXCERPT_BACKFILL_BATCH_SIZE: Final = 500
+# 게시글 검색 ngram token 길이. MySQL의 ngram_token_size와 같아야 한다
+POST_SEARCH_NGRAM_SIZE: Final = 2
+# 게시글 목록에서 허용하는 정렬 컬럼. 모두 index가 있는 컬럼이어야 한다 (POST_WRITE_TIME_IDX, PK)
+POST_ORDER_FIELDS: Final = ('post_write_time', 'post_id_pk')
+POST_DEFAULT_ORDER: Final = 'post_write_time'
 
 IMAGE_MAX_PAGE_SIZE: Final = 500
 IMAGE_MIN_PAGE_SIZE: Final = 1
@@ -18,6 +26,19 @@ COMMENT_MAX_PAGE_SIZE: Final = 25
 COMMENT_MIN_PAGE_SIZE: Final = 1
 COMMENT_DEFAULT_PAGE_SIZE: Final = 10
 
+PAGINATION_COUNT_CACHE_PREFIX: Final = 'jgw_hub:count'
+PAGINATION_COUNT_CACHE_TTL: Final = 30
+
+RESPONSE_CACHE_PREFIX: Final = 'jgw_hub:response'
+# version으로 무효화하므로 TTL은 signal 없이 바뀐 데이터(ex. queryset.update)를 위한 안전장치
+RESPONSE_CACHE_TTL: Final = 60
+
+# 같은 결과를 동시에 계산하지 않도록 하는 lease. 계산한 worker가 죽어도 LEASE_TIMEOUT 후 풀린다
+SINGLE_FLIGHT_LEASE_PREFIX: Final = 'jgw_hub:lease'
+SINGLE_FLIGHT_LEASE_TIMEOUT: Final = 10
+SINGLE_FLIGHT_WAIT_TIMEOUT: Final = 3
+SINGLE_FLIGHT_POLL_INTERVAL: Final = 0.05
+
 SURVEY_MAX_PAGE_SIZE: Final = 50
 SURVEY_MIN_PAGE_SIZE: Final = 1
 SURVEY_DEFAULT_PAGE_SIZE: Final = 10
@@ -26,6 +47,24 @@ ANSWER_MAX_PAGE_SIZE: Final = 100
 ANSWER_MIN_PAGE_SIZE: Final = 25
 ANSWER_DEFAULT_PAGE_SIZE: Final = 50
 
+SURVEY_EXPORT_BATCH_SIZE: Final = 500
+# csv를 excel로 열 때 수식으로 해석되는 시작 문자
+CSV_FORMULA_PREFIXES: Final = ('=', '+', '-', '@', '\t', '\r')
+
+SURVEY_DEFINITION_CACHE_TTL: Final = 5
+SURVEY_DEFINITION_CACHE_SIZE: Final = 256
+
+# 여러 admin이 동시에 요청한 설문 분석 결과를 나눠 쓰기 위해 잠깐 보관
+SURVEY_ANALYSIS_CACHE_PREFIX: Final = 'jgw_hub:survey_analysis'
+SURVEY_ANALYSIS_CACHE_TTL: Final = 5
+
+SURVEY_BULK_MAX_SIZE: Final = 5000
+
+REGISTRY_CACHE_PREFIX: Final = 'jgw_hub:registry'
+REGISTRY_VERSION_CHECK_INTERVAL: Final = 1
+REGISTRY_MAX_AGE: Final = 300
+CONFIG_REGISTRY_MAX_AGE: Final = 30
+
 SURVEY_DB_NAME = 'survey'
 SURVEY_POST_DB_NME = 'survey_post'
 SURVEY_POST_DB_VALIDATOR = {
@@ -217,5 +256,6 @@ QUIZ_TYPE_S2I = {
 
 SURVEY_QUIZ = 'survey_quiz'
 SURVEY_ANSWER = 'survey_answer'
+SURVEY_TALLY = 'survey_tally'
 
 TIME_QUERY = '%Y-%m-%dT%H-%M-%S'
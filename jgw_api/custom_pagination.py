@@ -1,90 +1,301 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, BasePagination
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
 from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.db.models import Q
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator, Page, EmptyPage, PageNotAnInteger
+from django.utils.functional import cached_property
+
+import hashlib
+import functools
+
+import json
+import base64
+import binascii
+import datetime
 
 
 from rest_framework.response import Response
 
 import jgw_api.constant as constant
 
-class BoardPageNumberPagination(PageNumberPagination):
-    page_size = constant.BOARD_DEFAULT_PAGE_SIZE
+class CachedCountPaginator(Paginator):
+    '''
+    전체 개수를 잠깐 cache 해두는 paginator.
+    같은 조건(SQL, 파라미터)의 목록을 여러 페이지 넘겨볼 때 COUNT(*)를 매번 다시 하지 않는다.
+    version을 key에 넣어서, 응답 cache version이 바뀌면 개수도 다시 센다.
+    '''
+    def __init__(self, *args, version: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = version
+
+    @cached_property
+    def count(self):
+        object_list = self.object_list
+        if not hasattr(object_list, 'query'):
+            return super().count
+        try:
+            sql, params = object_list.query.get_compiler(object_list.db).as_sql()
+        except EmptyResultSet:
+            # 조건상 결과가 없는 목록 (ex. 읽을 수 있는 게시판이 없음)
+            return 0
+        signature = f'{object_list.db}\n{sql}\n{params!r}\n{self.version}'
+        key = f'{constant.PAGINATION_COUNT_CACHE_PREFIX}:{hashlib.sha1(signature.encode()).hexdigest()}'
+        count = cache.get(key)
+        if count is None:
+            count = object_list.count()
+            cache.set(key, count, timeout=constant.PAGINATION_COUNT_CACHE_TTL)
+        return count
+
+
+class NoCountPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class NoCountPaginator(Paginator):
+    '''
+    전체 개수를 세지 않는 paginator. 한개 더 읽어서 다음 페이지가 있는지만 확인한다.
+    '''
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage('That page contains no results')
+        has_next = len(object_list) > self.per_page
+        # 전체 페이지 수 대신 지금까지 확인된 페이지 수
+        self._known_pages = number + int(has_next)
+        return NoCountPage(object_list[:self.per_page], number, self, has_next)
+
+    @property
+    def num_pages(self):
+        return getattr(self, '_known_pages', 1)
+
+
+class HubPageNumberPagination(PageNumberPagination):
+    '''
+    hub의 page number 페이지네이션. 게시판, 게시글, 이미지, 댓글 페이지네이션이 크기 제한만 바꿔서 사용한다.
+
+    - page_size는 min_page_size ~ max_page_size 범위로 맞추고, 잘못된 값이면 기본 크기를 사용
+    - 다음/이전 링크는 요청의 QueryDict를 복사해 page, page_size만 바꾸고 key 순으로 정렬해서 만든다.
+      1페이지 링크에도 page=1을 붙인다
+    - include_total=0 이면 전체 개수(COUNT(*))를 세지 않고 total_pages를 null로 응답.
+      응답 cache version이 있는 목록만 CachedCountPaginator로 잠깐 cache 된 개수를 사용한다
+    '''
+    page_size = constant.POST_DEFAULT_PAGE_SIZE
+    min_page_size = constant.POST_MIN_PAGE_SIZE
+    max_page_size = constant.POST_MAX_PAGE_SIZE
     page_size_query_param = 'page_size'
-    max_page_size = constant.BOARD_MAX_PAGE_SIZE
+    include_total_query_param = 'include_total'
+
+    def get_page_size(self, request):
+        if self.page_size_query_param in request.query_params:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+            except (TypeError, ValueError):
+                return self.page_size
+            # page size를 최소~최대 범위 안에서 지정
+            return min(max(page_size, self.min_page_size), self.max_page_size)
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.include_total = request.query_params.get(self.include_total_query_param, '1') != '0'
+        version = getattr(request, 'response_cache_version', None)
+        if self.include_total and version:
+            # 응답 cache를 사용하는 목록이면 같은 version으로 개수 cache를 구분
+            self.django_paginator_class = functools.partial(CachedCountPaginator, version=version)
+        elif self.include_total:
+            # version이 없는 목록(댓글, 이미지)은 글이 추가돼도 개수 cache를 지울 수 없으므로 매번 센다
+            self.django_paginator_class = Paginator
+        else:
+            self.django_paginator_class = NoCountPaginator
+        self.current_page_size = self.get_page_size(request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_total_pages(self):
+        return self.page.paginator.num_pages if self.include_total else None
+
+    def _link_parts(self):
+        # 링크마다 QueryDict를 복사하지 않도록 page를 뺀 나머지 query와 기본 url은 한번만 만든다
+        parts = getattr(self, '_cached_link_parts', None)
+        if parts is None:
+            query_params = self.request.query_params
+            query = [
+                (key, values) for key, values in query_params.lists()
+                if key not in (self.page_query_param, self.page_size_query_param)
+            ]
+            if self.page_size_query_param in query_params:
+                query.append((self.page_size_query_param, [str(self.current_page_size)]))
+            parts = self._cached_link_parts = (self.request.build_absolute_uri(self.request.path), query)
+        return parts
+
+    def get_page_link(self, page_number):
+        base_url, query = self._link_parts()
+        query = sorted(query + [(self.page_query_param, [str(page_number)])])
+        return f'{base_url}?{urlencode(query, doseq=True)}'
+
+    def get_next_link(self):
+        if not self.page.has_next():
+            return None
+        return self.get_page_link(self.page.number + 1)
+
+    def get_previous_link(self):
+        if not self.page.has_previous():
+            return None
+        return self.get_page_link(self.page.number - 1)
 
     def get_paginated_response(self, data):
-        previous = self.get_previous_link()
-        if previous is not None and previous.endswith('board/'):
-            previous += '?page=1'
         return Response(OrderedDict([
             ('count', len(data)),
-            ('total_pages', self.page.paginator.num_pages),
+            ('total_pages', self.get_total_pages()),
             ('next', self.get_next_link()),
-            ('previous', previous),
+            ('previous', self.get_previous_link()),
             ('results', data)
         ]))
 
-class PostPageNumberPagination(PageNumberPagination):
+
+class BoardPageNumberPagination(HubPageNumberPagination):
+    page_size = constant.BOARD_DEFAULT_PAGE_SIZE
+    min_page_size = constant.BOARD_MIN_PAGE_SIZE
+    max_page_size = constant.BOARD_MAX_PAGE_SIZE
+
+
+class PostPageNumberPagination(HubPageNumberPagination):
     page_size = constant.POST_DEFAULT_PAGE_SIZE
-    page_size_query_param = 'page_size'
+    min_page_size = constant.POST_MIN_PAGE_SIZE
     max_page_size = constant.POST_MAX_PAGE_SIZE
 
-    def get_paginated_response(self, data):
-        previous = self.get_previous_link()
-        if previous is not None:
-            query = {k: v for k, v in list(map(lambda x: x.split('='), previous.split('?')[1].split('&')))}
-            print(query)
-            if 'page' not in query:
-                query['page'] = '1'
-                query = sorted(query.items(), key=lambda x: x[0])
-                previous = previous.split('?')[0] + '?' + '&'.join([f'{i[0]}={i[1]}' for i in query])
-        return Response(OrderedDict([
-            ('count', len(data)),
-            ('total_pages', self.page.paginator.num_pages),
-            ('next', self.get_next_link()),
-            ('previous', previous),
-            ('results', data)
-        ]))
 
-class ImagePageNumberPagination(PageNumberPagination):
+class ImagePageNumberPagination(HubPageNumberPagination):
     page_size = constant.IMAGE_DEFAULT_PAGE_SIZE
-    page_size_query_param = 'page_size'
+    min_page_size = constant.IMAGE_MIN_PAGE_SIZE
     max_page_size = constant.IMAGE_MAX_PAGE_SIZE
 
-    def get_paginated_response(self, data):
-        previous = self.get_previous_link()
-        if previous is not None:
-            query = {k: v for k, v in list(map(lambda x: x.split('='), previous.split('?')[1].split('&')))}
-            print(query)
-            if 'page' not in query:
-                query['page'] = '1'
-                query = sorted(query.items(), key=lambda x: x[0])
-                previous = previous.split('?')[0] + '?' + '&'.join([f'{i[0]}={i[1]}' for i in query])
-        return Response(OrderedDict([
-            ('count', len(data)),
-            ('total_pages', self.page.paginator.num_pages),
-            ('next', self.get_next_link()),
-            ('previous', previous),
-            ('results', data)
-        ]))
 
-class CommentPageNumberPagination(PageNumberPagination):
+class CommentPageNumberPagination(HubPageNumberPagination):
     page_size = constant.COMMENT_DEFAULT_PAGE_SIZE
-    page_size_query_param = 'page_size'
+    min_page_size = constant.COMMENT_MIN_PAGE_SIZE
     max_page_size = constant.COMMENT_MAX_PAGE_SIZE
 
+
+class PostCursorPagination(BasePagination):
+    '''
+    게시글 목록 cursor 페이지네이션. (post_write_time, post_id_pk) 순서의 keyset으로 다음/이전 페이지를 찾으므로
+    OFFSET, COUNT(*) 없이 페이지 깊이와 관계없이 일정한 비용으로 조회한다.
+    cursor 파라미터가 있거나 pagination=cursor로 요청하면 사용한다.
+    '''
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    # keyset의 첫번째 정렬 기준. 다른 정렬로는 cursor 모드를 사용할 수 없다
+    ordering_field = 'post_write_time'
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def is_requested(cls, request) -> bool:
+        return cls.cursor_query_param in request.query_params \
+            or request.query_params.get('pagination') == 'cursor'
+
+    @staticmethod
+    def encode_cursor(post_write_time: datetime.datetime, post_id_pk: int, reverse: bool) -> str:
+        data = json.dumps({'t': post_write_time.isoformat(), 'id': post_id_pk, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str):
+        try:
+            cursor += '=' * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            return datetime.datetime.fromisoformat(data['t']), int(data['id']), bool(data['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, constant.POST_DEFAULT_PAGE_SIZE))
+        except (TypeError, ValueError):
+            page_size = constant.POST_DEFAULT_PAGE_SIZE
+        # page size를 최소~최대 범위 안에서 지정
+        return min(max(page_size, constant.POST_MIN_PAGE_SIZE), constant.POST_MAX_PAGE_SIZE)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.descending = bool(int(request.query_params.get('desc', 0) or 0))
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        position, reverse = None, False
+        if cursor:
+            post_write_time, post_id_pk, reverse = self.decode_cursor(cursor)
+            position = (post_write_time, post_id_pk)
+
+        # 이전 페이지는 반대 방향으로 읽은 뒤 다시 뒤집는다
+        forward = self.descending == reverse
+        if forward:
+            queryset = queryset.order_by('post_write_time', 'post_id_pk')
+        else:
+            queryset = queryset.order_by('-post_write_time', '-post_id_pk')
+
+        if position is not None:
+            post_write_time, post_id_pk = position
+            if forward:
+                queryset = queryset.filter(
+                    Q(post_write_time__gt=post_write_time) |
+                    Q(post_write_time=post_write_time, post_id_pk__gt=post_id_pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(post_write_time__lt=post_write_time) |
+                    Q(post_write_time=post_write_time, post_id_pk__lt=post_id_pk)
+                )
+
+        # 한개 더 읽어서 다음 페이지가 있는지 확인
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.first = results[0] if results else None
+        self.last = results[-1] if results else None
+        return results
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        cursor = self.encode_cursor(self.last.post_write_time, self.last.post_id_pk, False)
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        cursor = self.encode_cursor(self.first.post_write_time, self.first.post_id_pk, True)
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
     def get_paginated_response(self, data):
-        previous = self.get_previous_link()
-        if previous is not None:
-            query = {k: v for k, v in list(map(lambda x: x.split('='), previous.split('?')[1].split('&')))}
-            print(query)
-            if 'page' not in query:
-                query['page'] = '1'
-                query = sorted(query.items(), key=lambda x: x[0])
-                previous = previous.split('?')[0] + '?' + '&'.join([f'{i[0]}={i[1]}' for i in query])
         return Response(OrderedDict([
             ('count', len(data)),
-            ('total_pages', self.page.paginator.num_pages),
             ('next', self.get_next_link()),
-            ('previous', previous),
+            ('previous', self.get_previous_link()),
             ('results', data)
         ]))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from jgw_api.models import Post
+from jgw_api.response_cache import bump_board_versions
+
+import jgw_api.constant as constant
+
+
+class Command(BaseCommand):
+    help = '게시글 목록에 사용하는 본문 요약(post_excerpt)을 기존 게시글에 채웁니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='요약이 이미 있는 게시글도 다시 계산합니다.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=constant.POST_EXCERPT_BACKFILL_BATCH_SIZE,
+            help='한번에 읽고 저장할 게시글 수',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Post.objects.only('post_id_pk', 'post_content', 'post_excerpt', 'board_boadr_id_pk').order_by('post_id_pk')
+        if not options['all']:
+            queryset = queryset.filter(post_excerpt='')
+
+        # 본문 전체를 한번에 메모리에 올리지 않도록 post id 순서로 나눠서 처리
+        last_pk = None
+        updated = 0
+        changed_boards = set()
+        while True:
+            batch_queryset = queryset if last_pk is None else queryset.filter(post_id_pk__gt=last_pk)
+            batch = list(batch_queryset[:batch_size])
+            if not batch:
+                break
+            changed = []
+            for post in batch:
+                excerpt = Post.make_excerpt(post.post_content)
+                if post.post_excerpt != excerpt:
+                    post.post_excerpt = excerpt
+                    changed.append(post)
+            Post.objects.bulk_update(changed, ['post_excerpt'])
+            changed_boards.update(post.board_boadr_id_pk_id for post in changed)
+            updated += len(changed)
+            last_pk = batch[-1].post_id_pk
+            self.stdout.write(f'~{last_pk}\tupdated: {len(changed)}')
+        # bulk_update는 signal을 보내지 않으므로 게시글 목록 응답 cache를 직접 무효화
+        bump_board_versions(*changed_boards)
+        self.stdout.write(self.style.SUCCESS(f'{updated} post excerpt(s) backfilled.'))
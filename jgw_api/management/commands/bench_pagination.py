@@ -0,0 +1,75 @@
+import os
+import time
+import contextlib
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from jgw_api.custom_pagination import PostPageNumberPagination
+
+
+class _LegacyPagination(PageNumberPagination):
+    # 통합 전 PostPageNumberPagination의 이전 링크 생성 방식 (비교용)
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_paginated_response(self, data):
+        previous = self.get_previous_link()
+        if previous is not None:
+            query = {k: v for k, v in list(map(lambda x: x.split('='), previous.split('?')[1].split('&')))}
+            print(query)
+            if 'page' not in query:
+                query['page'] = '1'
+                query = sorted(query.items(), key=lambda x: x[0])
+                previous = previous.split('?')[0] + '?' + '&'.join([f'{i[0]}={i[1]}' for i in query])
+        return Response(OrderedDict([
+            ('count', len(data)),
+            ('total_pages', self.page.paginator.num_pages),
+            ('next', self.get_next_link()),
+            ('previous', previous),
+            ('results', data)
+        ]))
+
+
+class Command(BaseCommand):
+    help = '페이지네이션 응답 하나를 만드는 데 드는 시간을 측정합니다. (DB 조회 제외)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000, help='측정 반복 횟수')
+        parser.add_argument('--page', type=int, default=2, help='요청할 페이지 번호')
+
+    def _measure(self, pagination_class, request, object_list, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            paginator = pagination_class()
+            page = paginator.paginate_queryset(object_list, request)
+            paginator.get_paginated_response(page)
+        return (time.perf_counter() - start) / iterations * 1_000_000
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = APIRequestFactory()
+        request = Request(factory.get('/hub/api/v1/post/list/', {
+            'page': options['page'],
+            'page_size': 10,
+            'title': '공지',
+            'desc': 1,
+        }, HTTP_HOST=next((h for h in settings.ALLOWED_HOSTS if '*' not in h), 'localhost')))
+        object_list = list(range(1000))
+
+        # 기존 방식은 stdout에 print 하므로 /dev/null로 돌려서 출력 비용만 제외하고 측정
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            legacy = self._measure(_LegacyPagination, request, object_list, iterations)
+        unified = self._measure(PostPageNumberPagination, request, object_list, iterations)
+
+        self.stdout.write(f'legacy\t{legacy:.2f} us/response')
+        self.stdout.write(f'unified\t{unified:.2f} us/response')
+        self.stdout.write(self.style.SUCCESS(f'{iterations} iterations, page {options["page"]}'))
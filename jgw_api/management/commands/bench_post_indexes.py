@@ -0,0 +1,104 @@
+import random
+import datetime
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+
+from jgw_api.models import Board, Comment, Member, Post, Role
+
+
+class Command(BaseCommand):
+    help = '임시 테스트 DB에 게시글/댓글을 채우고, 복합 index가 있을 때와 없을 때의 실행 계획과 조회 시간을 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='jgw_api', help='임시 테스트 DB를 만들 database alias')
+        parser.add_argument('--posts', type=int, default=50000, help='채울 게시글 수')
+        parser.add_argument('--comments', type=int, default=100000, help='채울 댓글 수')
+        parser.add_argument('--repeat', type=int, default=50, help='쿼리마다 측정할 횟수')
+
+    def _seed(self, database, post_count, comment_count):
+        rng = random.Random(0)
+        role = Role.objects.using(database).create(role_pk=100, role_nm='ROLE_USER0')
+        boards = Board.objects.using(database).bulk_create([
+            Board(board_name=f'board{i}', board_layout=1, role_role_pk_write_level=role,
+                  role_role_pk_read_level=role, role_role_pk_comment_write_level=role)
+            for i in range(20)
+        ])
+        members = Member.objects.using(database).bulk_create([
+            Member(member_pk=f'member{i}', member_nm=f'member{i}', member_email=f'member{i}@bench.com',
+                   role_role_pk=role, member_status=1)
+            for i in range(200)
+        ])
+        start = datetime.datetime(2020, 1, 1)
+        Post.objects.using(database).bulk_create([
+            Post(post_title=f'post{i}', post_content='', post_excerpt='', thumbnail_id_pk=0,
+                 post_write_time=start + datetime.timedelta(minutes=i), post_update_time=start,
+                 board_boadr_id_pk=rng.choice(boards), member_member_pk=rng.choice(members))
+            for i in range(post_count)
+        ], batch_size=1000)
+        post_ids = list(Post.objects.using(database).values_list('post_id_pk', flat=True))
+        Comment.objects.using(database).bulk_create([
+            Comment(comment_depth=0, comment_content='', comment_delete=0, post_post_id_pk_id=rng.choice(post_ids),
+                    member_member_pk=rng.choice(members))
+            for _ in range(comment_count)
+        ], batch_size=1000)
+        return boards, members, post_ids
+
+    def _queries(self, database, boards, members, post_ids):
+        # post_get_all_query, CommentViewSet.list 에서 자주 쓰는 형태
+        board, member, post_id = boards[0], members[0], post_ids[len(post_ids) // 2]
+        posts = Post.objects.using(database)
+        return {
+            'post by board': posts.filter(board_boadr_id_pk=board).order_by('post_write_time')[:10],
+            'post by member, date': posts.filter(
+                member_member_pk=member,
+                post_write_time__range=(datetime.datetime(2020, 1, 10), datetime.datetime(2020, 2, 10)),
+            ).order_by('post_write_time')[:10],
+            'post cursor': posts.order_by('-post_write_time', '-post_id_pk')[:10],
+            'comment by post': Comment.objects.using(database).filter(
+                post_post_id_pk=post_id, comment_comment_id_ref=None
+            ).order_by('-comment_id')[:10],
+        }
+
+    def _measure(self, queries, repeat):
+        result = {}
+        for name, queryset in queries.items():
+            plan = ' | '.join(queryset.explain().splitlines())
+            elapsed = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                elapsed.append((time.perf_counter() - start) * 1000)
+            result[name] = (plan, statistics.median(elapsed))
+        return result
+
+    def handle(self, *args, **options):
+        database = options['database']
+        connection = connections[database]
+        # migration 대신 현재 모델로 테이블을 만들어 Meta.indexes가 그대로 반영되게 한다
+        with override_settings(MIGRATION_MODULES={'jgw_api': None}):
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            boards, members, post_ids = self._seed(database, options['posts'], options['comments'])
+            queries = self._queries(database, boards, members, post_ids)
+            indexed = self._measure(queries, options['repeat'])
+
+            with connection.schema_editor() as schema_editor:
+                for model in (Post, Comment):
+                    for index in model._meta.indexes:
+                        schema_editor.remove_index(model, index)
+            not_indexed = self._measure(queries, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        for name in queries:
+            (plan_before, before), (plan_after, after) = not_indexed[name], indexed[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f'  without index\t{before:.3f} ms\t{plan_before}')
+            self.stdout.write(f'  with index\t{after:.3f} ms\t{plan_after}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["posts"]} posts, {options["comments"]} comments, median of {options["repeat"]} runs'
+        ))
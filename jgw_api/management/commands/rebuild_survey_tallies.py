@@ -0,0 +1,30 @@
+from bson.objectid import ObjectId
+
+from django.core.management.base import BaseCommand
+
+from jgw_api.survey_db import get_survey_collections
+from jgw_api.survey_tally import rebuild_survey_tally
+
+
+class Command(BaseCommand):
+    help = '저장된 답변으로부터 설문 문항별 집계(survey_tally)를 다시 계산합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey',
+            action='append',
+            default=[],
+            help='다시 계산할 설문 id. 지정하지 않으면 모든 설문을 다시 계산합니다. 여러번 지정할 수 있습니다.',
+        )
+
+    def handle(self, *args, **options):
+        collections = get_survey_collections()
+        if options['survey']:
+            targets = [ObjectId(i) for i in options['survey']]
+        else:
+            targets = [i['_id'] for i in collections.survey.find({}, {'_id': 1})]
+
+        for parent_post in targets:
+            answer_count = rebuild_survey_tally(parent_post, collections)
+            self.stdout.write(f'{parent_post}\tanswers: {answer_count}')
+        self.stdout.write(self.style.SUCCESS(f'{len(targets)} survey tally(ies) rebuilt.'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from jgw_api.survey_db import (
+    ensure_survey_indexes,
+    find_missing_survey_indexes,
+)
+
+
+class Command(BaseCommand):
+    help = '설문 collection에 필요한 index를 생성하거나(기본) 없는 index를 확인합니다(--check).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='index를 생성하지 않고 없는 index만 출력합니다. 없는 index가 있으면 실패로 종료합니다.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            failed = ensure_survey_indexes()
+            for name, index_name in failed:
+                self.stderr.write(f'create failed\t{name}.{index_name}')
+            if failed:
+                raise CommandError(f'{len(failed)} survey index(es) could not be created.')
+
+        missing = find_missing_survey_indexes()
+        for name, index_name in missing:
+            self.stdout.write(f'missing\t{name}.{index_name}')
+        if missing:
+            raise CommandError(f'{len(missing)} survey index(es) missing.')
+        self.stdout.write(self.style.SUCCESS('All survey indexes exist.'))
@@ -0,0 +1,115 @@
+import logging
+
+from dataclasses import dataclass
+from functools import cached_property
+from typing import FrozenSet, Optional
+
+from .registry import get_role_pk, get_configs, get_board_permission, get_board_permissions
+
+logger = logging.getLogger('hub_error')
+
+
+@dataclass(frozen=True)
+class AuthContext:
+    '''
+    gateway가 전달한 유저 정보를 요청마다 한번만 해석해 둔 읽기 전용 객체.
+    admin role, 읽을 수 있는 게시판처럼 필요할 때만 쓰는 값은 처음 사용할 때 한번만 계산한다.
+    '''
+    uid: Optional[str]
+    role: Optional[int]
+
+    @classmethod
+    def from_meta(cls, meta: dict) -> 'AuthContext':
+        '''
+        request.META의 gateway header로 AuthContext를 만드는 함수
+
+        :param meta: request.META
+        :return: AuthContext. header가 없거나 잘못됐다면 authenticated가 False
+        '''
+        user_uid = meta.get('HTTP_USER_PK', None)
+        user_role_id = meta.get('HTTP_ROLE_PK', None)
+        try:
+            user_role_id = None if user_role_id is None else int(user_role_id)
+        except (TypeError, ValueError):
+            user_role_id = None
+        if user_uid is None or user_role_id is None:
+            return cls(uid=None, role=None)
+        logger.debug(f'get user information success\tuser uid: {user_uid}\tuser role: {user_role_id}')
+        return cls(uid=user_uid, role=user_role_id)
+
+    @property
+    def authenticated(self) -> bool:
+        return self.uid is not None and self.role is not None
+
+    @property
+    def effective_role(self) -> int:
+        # user role이 없다면 최하위 권한 적용
+        return self.role if self.authenticated else -1
+
+    @cached_property
+    def admin_role(self) -> Optional[int]:
+        return get_role_pk('ROLE_ADMIN')
+
+    @cached_property
+    def min_upload_role(self) -> Optional[int]:
+        return get_configs().get_int('min_upload_role_pk')
+
+    @property
+    def is_admin(self) -> bool:
+        return self.authenticated and self.admin_role is not None and self.role >= self.admin_role
+
+    @cached_property
+    def readable_board_ids(self) -> FrozenSet[int]:
+        '''
+        요청한 유저가 게시글을 읽을 수 있는 게시판 id 목록
+        '''
+        permissions = get_board_permissions()
+        if self.is_admin:
+            return frozenset(permissions)
+        return frozenset(
+            board_id for board_id, permission in permissions.items()
+            if permission.read <= self.effective_role
+        )
+
+    def can_read_board(self, board_id: int) -> bool:
+        return self._allowed(board_id, 'read')
+
+    def can_write_board(self, board_id: int) -> bool:
+        return self._allowed(board_id, 'write')
+
+    def can_comment_board(self, board_id: int) -> bool:
+        return self._allowed(board_id, 'comment_write')
+
+    def _allowed(self, board_id: int, action: str) -> bool:
+        # admin or 해당 게시판의 action 레벨 이상이면 허용
+        if self.is_admin:
+            return True
+        permission = get_board_permission(board_id)
+        return permission is not None and self.effective_role >= getattr(permission, action)
+
+
+class AuthContextMiddleware:
+    '''
+    요청마다 AuthContext를 만들어 request.auth_context에 붙이는 middleware
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.auth_context = AuthContext.from_meta(request.META)
+        return self.get_response(request)
+
+
+def get_auth_context(request) -> AuthContext:
+    '''
+    request에 붙어있는 AuthContext를 가져오는 함수. middleware를 거치지 않은 요청이면 새로 만들어 붙인다.
+
+    :param request: django request 혹은 drf request
+    :return: AuthContext
+    '''
+    context = getattr(request, 'auth_context', None)
+    if context is None:
+        context = AuthContext.from_meta(request.META)
+        # drf request라면 원래 django request에 붙여야 같은 요청에서 다시 사용할 수 있다
+        setattr(getattr(request, '_request', request), 'auth_context', context)
+    return context
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jgw_api', '0001_initial'),
+    ]
+
+    operations = [
+        # 게시글 대표 이미지를 IMAGE FK 대신 썸네일 id로 저장하도록 바뀐 모델을 migration에 반영
+        migrations.RemoveField(
+            model_name='post',
+            name='image_image_id_pk',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_id_pk',
+            field=models.IntegerField(db_column='THUMBNAIL_ID_PK', default=0),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jgw_api', '0002_post_thumbnail_id_pk'),
+    ]
+
+    operations = [
+        # 기존 게시글의 요약은 `python manage.py backfill_post_excerpts`로 채운다
+        migrations.AddField(
+            model_name='post',
+            name='post_excerpt',
+            field=models.CharField(blank=True, db_column='POST_EXCERPT', default='', max_length=500),
+        ),
+    ]
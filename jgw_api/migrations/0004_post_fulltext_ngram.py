@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# 한글 검색을 위해 ngram parser를 사용. 짧은 token이 빠지지 않도록 MySQL 서버에서
+# ngram_token_size=2, innodb_ft_enable_stopword=OFF 로 설정되어 있어야 한다
+FULLTEXT_INDEXES = (
+    ('POST_TITLE_NGRAM_FT', 'POST_TITLE'),
+    ('POST_CONTENT_NGRAM_FT', 'POST_CONTENT'),
+)
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    # FULLTEXT index는 MySQL에서만 만든다. 다른 DB는 icontains 검색만 사용
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for index_name, column in FULLTEXT_INDEXES:
+        schema_editor.execute(f'ALTER TABLE `POST` ADD FULLTEXT INDEX `{index_name}` (`{column}`) WITH PARSER ngram')
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for index_name, _ in FULLTEXT_INDEXES:
+        schema_editor.execute(f'ALTER TABLE `POST` DROP INDEX `{index_name}`')
+
+
+class Migration(migrations.Migration):
+    # InnoDB는 FULLTEXT index를 transaction 안에서 만들 수 없음
+    atomic = False
+
+    dependencies = [
+        ('jgw_api', '0003_post_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
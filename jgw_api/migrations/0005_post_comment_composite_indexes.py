@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jgw_api', '0004_post_fulltext_ngram'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['board_boadr_id_pk', 'post_write_time', 'post_id_pk'], name='POST_BOARD_WRITE_TIME_IDX'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['member_member_pk', 'post_write_time'], name='POST_MEMBER_WRITE_TIME_IDX'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['post_write_time', 'post_id_pk'], name='POST_WRITE_TIME_IDX'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post_post_id_pk', 'comment_comment_id_ref', 'comment_id'], name='COMMENT_POST_REF_ID_IDX'),
+        ),
+    ]
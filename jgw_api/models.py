@@ -7,6 +7,8 @@
 # Feel free to rename the models, but don't rename db_table values or field names.
 from django.db import models
 
+import jgw_api.constant as constant
+
 
 class ApiRoute(models.Model):
     api_route_pk = models.AutoField(db_column='API_ROUTE_PK', primary_key=True)  # Field name made lowercase.
@@ -74,6 +76,10 @@ class Comment(models.Model):
     class Meta:
         managed = True
         db_table = 'COMMENT'
+        indexes = [
+            # 댓글 목록: 게시글의 최상위 댓글(ref IS NULL)을 -comment_id 순서로 조회
+            models.Index(fields=['post_post_id_pk', 'comment_comment_id_ref', 'comment_id'], name='COMMENT_POST_REF_ID_IDX'),
+        ]
 
 
 class Config(models.Model):
@@ -213,6 +219,7 @@ class Post(models.Model):
     post_id_pk = models.AutoField(db_column='POST_ID_PK', primary_key=True)  # Field name made lowercase.
     post_title = models.CharField(db_column='POST_TITLE', max_length=100)  # Field name made lowercase.
     post_content = models.TextField(db_column='POST_CONTENT')  # Field name made lowercase.
+    post_excerpt = models.CharField(db_column='POST_EXCERPT', max_length=constant.POST_EXCERPT_LENGTH, blank=True, default='')
     post_write_time = models.DateTimeField(db_column='POST_WRITE_TIME', auto_now_add=True)  # Field name made lowercase.
     post_update_time = models.DateTimeField(db_column='POST_UPDATE_TIME', auto_now=True)  # Field name made lowercase.
     thumbnail_id_pk = models.IntegerField(db_column='THUMBNAIL_ID_PK')  # Field name made lowercase.
@@ -222,6 +229,41 @@ class Post(models.Model):
     class Meta:
         managed = True
         db_table = 'POST'
+        indexes = [
+            # 게시판별 게시글 목록을 작성 시간 순서로 조회
+            models.Index(fields=['board_boadr_id_pk', 'post_write_time', 'post_id_pk'], name='POST_BOARD_WRITE_TIME_IDX'),
+            # 작성자별 게시글을 기간으로 조회
+            models.Index(fields=['member_member_pk', 'post_write_time'], name='POST_MEMBER_WRITE_TIME_IDX'),
+            # 게시판 조건 없는 목록, cursor 페이지네이션의 (작성 시간, id) keyset
+            models.Index(fields=['post_write_time', 'post_id_pk'], name='POST_WRITE_TIME_IDX'),
+        ]
+
+    @staticmethod
+    def make_excerpt(post_content: str) -> str:
+        '''
+        게시글 목록에 보여줄 본문 요약을 만드는 함수
+
+        :param post_content: 게시글 본문
+        :return: 본문 앞부분 POST_EXCERPT_LENGTH 글자
+        '''
+        return (post_content or '')[:constant.POST_EXCERPT_LENGTH]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 게시판이 바뀌었는지 저장할 때 다시 조회하지 않도록 DB에서 읽은 게시판을 기억 (signals.remember_post_board)
+        if 'board_boadr_id_pk_id' in instance.__dict__:
+            instance._loaded_board_id = instance.board_boadr_id_pk_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        # 본문이 바뀔 때마다 목록용 요약도 같이 저장. 본문을 읽지 않은(defer) instance는 건드리지 않음
+        if 'post_content' not in self.get_deferred_fields():
+            self.post_excerpt = self.make_excerpt(self.post_content)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'post_content' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'post_excerpt'}
+        super().save(*args, **kwargs)
 
 
 class Rank(models.Model):
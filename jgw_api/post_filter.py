@@ -0,0 +1,132 @@
+import datetime
+
+from dataclasses import dataclass
+from typing import Mapping, Optional, Tuple
+
+from django.db.models.query import QuerySet
+
+from .post_search import filter_post_search
+
+import jgw_api.constant as constant
+
+
+class PostFilterError(ValueError):
+    '''
+    게시글 목록 query parameter가 잘못되었을 때 발생하는 에러
+    '''
+    def __init__(self, param: str, message: str):
+        super().__init__(f'{param}: {message}')
+        self.param = param
+        self.message = message
+
+
+@dataclass(frozen=True)
+class PostFilterSpec:
+    '''
+    게시글 목록 query parameter를 검증하고 정규화한 조건.
+    같은 조건이면 parameter 순서, 빈 값과 관계없이 같은 spec이 되므로 hash해서 cache key로 사용할 수 있다.
+    '''
+    start_date: Optional[datetime.datetime] = None
+    end_date: Optional[datetime.datetime] = None
+    writer_uid: Optional[str] = None
+    writer_name: Optional[str] = None
+    board: Optional[int] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+    order: str = constant.POST_DEFAULT_ORDER
+    desc: bool = False
+
+    @property
+    def ordering(self) -> Tuple[str, ...]:
+        '''
+        order_by에 넘길 정렬 순서. 같은 값이 있어도 순서가 정해지도록 post id를 마지막에 붙인다.
+        '''
+        prefix = '-' if self.desc else ''
+        fields = (self.order,) if self.order == 'post_id_pk' else (self.order, 'post_id_pk')
+        return tuple(prefix + field for field in fields)
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        '''
+        spec의 조건과 정렬을 queryset에 거는 함수. 값이 없는 조건은 건너뛴다.
+
+        :param queryset: 조건을 걸 post queryset
+        :return: 조건과 정렬이 걸린 queryset
+        '''
+        if self.board is not None:
+            queryset = queryset.filter(board_boadr_id_pk=self.board)
+        if self.writer_uid is not None:
+            queryset = queryset.filter(member_member_pk=self.writer_uid)
+        if self.start_date is not None:
+            queryset = queryset.filter(post_write_time__gte=self.start_date)
+        if self.end_date is not None:
+            queryset = queryset.filter(post_write_time__lte=self.end_date)
+        if self.writer_name is not None:
+            queryset = queryset.filter(member_member_pk__member_nm__contains=self.writer_name)
+        if self.title is not None:
+            queryset = filter_post_search(queryset, 'post_title', self.title)
+        if self.content is not None:
+            queryset = filter_post_search(queryset, 'post_content', self.content)
+        return queryset.order_by(*self.ordering)
+
+
+def _text(query_params: Mapping, param: str) -> Optional[str]:
+    # 빈 문자열은 조건이 없는 것과 같으므로 None
+    value = query_params.get(param)
+    if value is None:
+        return None
+    value = str(value)
+    return value if value.strip() else None
+
+
+def _datetime(query_params: Mapping, param: str) -> Optional[datetime.datetime]:
+    value = _text(query_params, param)
+    if value is None:
+        return None
+    try:
+        return datetime.datetime.strptime(value, constant.TIME_QUERY)
+    except ValueError:
+        raise PostFilterError(param, f'must match {constant.TIME_QUERY}')
+
+
+def compile_post_filter(query_params: Mapping) -> PostFilterSpec:
+    '''
+    게시글 목록 query parameter를 PostFilterSpec으로 바꾸는 함수
+
+    :param query_params: request.query_params 혹은 같은 형태의 dict
+    :return: 정규화된 조건
+    :raise PostFilterError: 값의 형식이 잘못됐거나 허용하지 않는 정렬인 경우
+    '''
+    start_date = _datetime(query_params, 'start_date')
+    end_date = _datetime(query_params, 'end_date')
+    if start_date is not None and end_date is not None and start_date > end_date:
+        raise PostFilterError('start_date', 'must not be later than end_date')
+
+    board = _text(query_params, 'board')
+    if board is not None:
+        try:
+            board = int(board)
+        except ValueError:
+            raise PostFilterError('board', 'must be an integer')
+
+    order = _text(query_params, 'order') or constant.POST_DEFAULT_ORDER
+    if order not in constant.POST_ORDER_FIELDS:
+        # index가 없는 컬럼으로 정렬하면 전체를 읽어 정렬하므로 허용한 컬럼만 사용
+        raise PostFilterError('order', f'must be one of {", ".join(constant.POST_ORDER_FIELDS)}')
+
+    desc = _text(query_params, 'desc') or '0'
+    try:
+        desc = bool(int(desc))
+    except ValueError:
+        raise PostFilterError('desc', 'must be 0 or 1')
+
+    return PostFilterSpec(
+        start_date=start_date,
+        end_date=end_date,
+        writer_uid=_text(query_params, 'writer_uid'),
+        writer_name=_text(query_params, 'writer_name'),
+        board=board,
+        title=_text(query_params, 'title'),
+        content=_text(query_params, 'content'),
+        order=order,
+        desc=desc,
+    )
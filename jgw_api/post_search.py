@@ -0,0 +1,71 @@
+import logging
+
+from django.db import connections, NotSupportedError
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.query import QuerySet
+
+import jgw_api.constant as constant
+
+logger = logging.getLogger('hub_error')
+
+# 검색을 지원하는 게시글 필드. MySQL에서는 필드마다 ngram FULLTEXT index가 있어야 한다 (migration 0004)
+SEARCH_FIELDS = ('post_title', 'post_content')
+
+
+def ngram_words(text: str) -> list:
+    '''
+    검색어/본문을 공백 기준 단어로 나누는 함수. 대소문자 구분 없이 검색하므로 소문자로 바꾼다.
+
+    :param text: 나눌 문자열
+    :return: 단어 list
+    '''
+    return (text or '').lower().split()
+
+
+def is_indexable(keyword: str, n: int = constant.POST_SEARCH_NGRAM_SIZE) -> bool:
+    '''
+    검색어를 ngram index로 찾을 수 있는지 확인하는 함수.
+    n글자보다 짧은 단어가 있으면 ngram index로는 찾을 수 없으므로 LIKE 검색만 사용한다.
+    '''
+    words = ngram_words(keyword)
+    return bool(words) and all(len(word) >= n for word in words)
+
+
+class NgramMatch(Func):
+    '''
+    MySQL `MATCH (column) AGAINST (query IN BOOLEAN MODE)` 표현식. 검색어는 구문(phrase) 검색으로 감싼다.
+    '''
+    output_field = FloatField()
+
+    def __init__(self, field: str, keyword: str):
+        # boolean mode 연산자로 해석되지 않도록 큰따옴표를 지우고 구문으로 감싼다
+        phrase = '"' + ' '.join(keyword.replace('"', ' ').split()) + '"'
+        super().__init__(F(field), Value(phrase))
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        column, column_params = compiler.compile(self.source_expressions[0])
+        phrase, phrase_params = compiler.compile(self.source_expressions[1])
+        return f'MATCH ({column}) AGAINST ({phrase} IN BOOLEAN MODE)', (*column_params, *phrase_params)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError('NgramMatch is only supported on MySQL')
+
+
+def filter_post_search(queryset: QuerySet, field: str, keyword: str) -> QuerySet:
+    '''
+    게시글 제목/본문 검색 조건을 거는 함수.
+    MySQL이면 ngram FULLTEXT index로 후보를 먼저 줄이고, 줄어든 후보에만 기존 icontains 조건을 걸어
+    검색 결과는 icontains와 같게 유지한다. FULLTEXT index가 없는 DB는 icontains만 사용한다.
+
+    :param queryset: 검색 조건을 걸 post queryset
+    :param field: 검색할 필드 (post_title, post_content)
+    :param keyword: 검색어
+    :return: 검색 조건이 걸린 queryset
+    '''
+    if field not in SEARCH_FIELDS:
+        raise ValueError(f'{field} is not a searchable field')
+
+    if is_indexable(keyword) and connections[queryset.db].vendor == 'mysql':
+        alias = f'{field}_match'
+        queryset = queryset.alias(**{alias: NgramMatch(field, keyword)}).filter(**{f'{alias}__gt': 0})
+    return queryset.filter(**{f'{field}__icontains': keyword})
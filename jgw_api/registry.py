@@ -0,0 +1,216 @@
+import time
+import threading
+import logging
+
+from types import MappingProxyType
+from typing import Callable, Generic, Mapping, NamedTuple, Optional, TypeVar
+
+from django.core.cache import cache
+
+import jgw_api.constant as constant
+
+logger = logging.getLogger('hub_error')
+
+T = TypeVar('T')
+
+
+class VersionedRegistry(Generic[T]):
+    '''
+    자주 읽고 거의 바뀌지 않는 DB 데이터를 worker마다 한번만 읽어두는 저장소.
+    데이터가 바뀌면 공유 cache의 version을 올리고, 다른 worker는 version이 달라진 것을 보고 다시 읽는다.
+    version 확인은 REGISTRY_VERSION_CHECK_INTERVAL 초에 한번만 하므로 요청마다 드는 비용은 거의 없다.
+    '''
+    def __init__(self, name: str, loader: Callable[[], T], max_age: float = constant.REGISTRY_MAX_AGE):
+        '''
+        :param name: registry 이름. 공유 cache의 version key로 사용
+        :param loader: DB에서 데이터를 읽어오는 함수
+        :param max_age: version이 그대로여도 다시 읽는 주기(초). signal 없이 바뀌는 데이터를 위한 안전장치
+        '''
+        self.name = name
+        self.loader = loader
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._data: Optional[T] = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+    @property
+    def version_key(self) -> str:
+        return f'{constant.REGISTRY_CACHE_PREFIX}:{self.name}:version'
+
+    def _shared_version(self) -> int:
+        version = cache.get(self.version_key)
+        if version is None:
+            # 처음 사용하거나 cache가 비워졌다면 version을 새로 만든다.
+            # 1부터 다시 시작하면 예전 version과 겹칠 수 있으므로 현재 시각을 사용
+            cache.add(self.version_key, time.time_ns(), timeout=None)
+            version = cache.get(self.version_key)
+        return version
+
+    def get(self) -> T:
+        '''
+        registry 데이터를 가져오는 함수. 다른 worker에서 바뀐 것이 확인되면 DB에서 다시 읽는다.
+
+        :return: loader가 만든 데이터. 여러 요청이 공유하므로 수정하면 안된다.
+        '''
+        now = time.monotonic()
+        data = self._data
+        if data is not None and now - self._checked_at < constant.REGISTRY_VERSION_CHECK_INTERVAL:
+            return data
+
+        with self._lock:
+            now = time.monotonic()
+            version = self._shared_version()
+            if self._data is None \
+                    or version != self._version \
+                    or now - self._loaded_at >= self.max_age:
+                self._data = self.loader()
+                self._version = version
+                self._loaded_at = now
+                logger.debug(f'registry loaded\tname: {self.name}\tversion: {version}')
+            self._checked_at = now
+            return self._data
+
+    def reload(self) -> T:
+        '''
+        공유 version은 그대로 두고 이 worker의 데이터만 DB에서 다시 읽는 함수.
+        다른 worker에서 막 추가된 데이터를 찾지 못했을 때 사용한다.
+
+        :return: 다시 읽은 데이터
+        '''
+        with self._lock:
+            self._data = None
+            self._checked_at = 0.0
+        return self.get()
+
+    def invalidate(self) -> None:
+        '''
+        데이터가 바뀌었을 때 호출하는 함수. 이 worker의 데이터를 버리고 공유 version을 올린다.
+        '''
+        with self._lock:
+            self._data = None
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            # version key가 없다면 새로 만든다. 다른 worker는 version이 달라져 다시 읽는다
+            cache.add(self.version_key, time.time_ns(), timeout=None)
+        logger.debug(f'registry invalidated\tname: {self.name}')
+
+
+def _load_roles() -> dict:
+    from .models import Role
+    # role 이름 -> role 번호
+    return {role.role_nm: role.role_pk for role in Role.objects.all()}
+
+
+role_registry: VersionedRegistry[dict] = VersionedRegistry('role', _load_roles)
+
+
+def get_role_pk(role_nm: str) -> Optional[int]:
+    '''
+    role 이름으로 role 번호를 가져오는 함수. DB 대신 role registry를 사용한다.
+
+    :param role_nm: role 이름 (ex. ROLE_ADMIN)
+    :return: role 번호. 없는 role이면 None
+    '''
+    return role_registry.get().get(role_nm)
+
+
+class ConfigSnapshot:
+    '''
+    CONFIG, GATEWAY_MANAGEMENT_CONFIG 테이블을 한번에 읽어둔 읽기 전용 묶음
+    '''
+    def __init__(self, config: Mapping[str, str], gateway: Mapping[str, str]):
+        self.config = MappingProxyType(dict(config))
+        self.gateway = MappingProxyType(dict(gateway))
+
+    def get_str(self, config_nm: str, default: Optional[str] = None) -> Optional[str]:
+        return self.config.get(config_nm, default)
+
+    def get_int(self, config_nm: str, default: Optional[int] = None) -> Optional[int]:
+        value = self.config.get(config_nm)
+        return default if value is None else int(value)
+
+    def get_gateway_str(self, config_nm: str, default: Optional[str] = None) -> Optional[str]:
+        return self.gateway.get(config_nm, default)
+
+    def get_gateway_int(self, config_nm: str, default: Optional[int] = None) -> Optional[int]:
+        value = self.gateway.get(config_nm)
+        return default if value is None else int(value)
+
+
+def _load_configs() -> ConfigSnapshot:
+    from .models import Config, GatewayManagementConfig
+    config = {}
+    # config_nm이 중복된 경우 기존처럼 먼저 만들어진 row를 사용
+    for config_nm, config_val in Config.objects.order_by('config_pk').values_list('config_nm', 'config_val'):
+        config.setdefault(config_nm, config_val)
+    gateway = dict(GatewayManagementConfig.objects.values_list(
+        'gateway_management_config_nm', 'gateway_management_config_val'
+    ))
+    return ConfigSnapshot(config, gateway)
+
+
+# GATEWAY_MANAGEMENT_CONFIG는 gateway에서 직접 바꿀 수 있으므로 signal과 별개로 짧은 주기로 다시 읽음
+config_registry: VersionedRegistry[ConfigSnapshot] = VersionedRegistry(
+    'config', _load_configs, max_age=constant.CONFIG_REGISTRY_MAX_AGE
+)
+
+
+def get_configs() -> ConfigSnapshot:
+    '''
+    CONFIG, GATEWAY_MANAGEMENT_CONFIG 값을 DB 대신 config registry에서 가져오는 함수
+
+    :return: 읽기 전용 config 묶음
+    '''
+    return config_registry.get()
+
+
+class BoardPermission(NamedTuple):
+    '''
+    게시판별 읽기, 쓰기, 댓글 쓰기에 필요한 최소 role 번호
+    '''
+    read: int
+    write: int
+    comment_write: int
+
+
+def _load_board_permissions() -> Mapping[int, BoardPermission]:
+    from .models import Board
+    # role FK의 id만 읽으므로 ROLE 테이블은 join 하지 않음
+    rows = Board.objects.values_list(
+        'board_id_pk',
+        'role_role_pk_read_level_id',
+        'role_role_pk_write_level_id',
+        'role_role_pk_comment_write_level_id'
+    )
+    return MappingProxyType({
+        board_id: BoardPermission(read, write, comment_write)
+        for board_id, read, write, comment_write in rows
+    })
+
+
+board_permission_registry: VersionedRegistry[Mapping[int, BoardPermission]] = VersionedRegistry(
+    'board_permission', _load_board_permissions
+)
+
+
+def get_board_permissions() -> Mapping[int, BoardPermission]:
+    '''
+    게시판 id -> BoardPermission 읽기 전용 matrix를 가져오는 함수
+    '''
+    return board_permission_registry.get()
+
+
+def get_board_permission(board_id: int) -> Optional[BoardPermission]:
+    '''
+    게시판 하나의 권한을 가져오는 함수. 다른 worker에서 방금 만든 게시판이라 없다면 한번 다시 읽는다.
+
+    :param board_id: 게시판 id
+    :return: 게시판 권한. 없는 게시판이면 None
+    '''
+    permission = board_permission_registry.get().get(board_id)
+    if permission is None:
+        permission = board_permission_registry.reload().get(board_id)
+    return permission
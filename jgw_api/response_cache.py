@@ -0,0 +1,125 @@
+import time
+import json
+import hashlib
+import logging
+
+from typing import Callable, Dict, Iterable
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from .single_flight import single_flight
+
+import jgw_api.constant as constant
+
+logger = logging.getLogger('hub_error')
+
+# 게시판 목록 응답 version. 게시판, role이 바뀌면 올린다
+BOARD_LIST_VERSION = 'board_list'
+# 게시글 목록에 nested로 보여주는 작성자 version. member가 바뀌면 올린다
+MEMBER_VERSION = 'member'
+
+
+def board_version(board_id: int) -> str:
+    '''
+    게시판 하나의 version 이름. 해당 게시판의 게시글이나 게시판 자체가 바뀌면 올린다.
+    '''
+    return f'board:{board_id}'
+
+
+def survey_version(survey_id) -> str:
+    '''
+    설문 하나의 version 이름. 설문 답변이 추가/수정/삭제되면 올린다.
+    '''
+    return f'survey:{survey_id}'
+
+
+def _version_key(name: str) -> str:
+    return f'{constant.RESPONSE_CACHE_PREFIX}:version:{name}'
+
+
+def get_versions(names: Iterable[str]) -> Dict[str, int]:
+    '''
+    version 여러개를 한번에 가져오는 함수. 없는 version은 새로 만든다.
+
+    :param names: version 이름 목록
+    :return: version 이름 -> version
+    '''
+    keys = {_version_key(name): name for name in names}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        # cache가 비워졌을 때 예전 version과 겹치지 않도록 현재 시각으로 시작
+        now = time.time_ns()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump_versions(*names: str) -> None:
+    '''
+    version을 올려서 해당 version으로 만들어진 응답 cache를 모두 쓰지 않게 하는 함수
+
+    :param names: 올릴 version 이름
+    '''
+    for name in set(names):
+        key = _version_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+    logger.debug(f'response cache version bumped\tversions: {names}')
+
+
+def bump_board_versions(*board_ids) -> None:
+    '''
+    게시판 version을 올리는 함수. None은 무시한다.
+    '''
+    bump_versions(*(board_version(board_id) for board_id in board_ids if board_id is not None))
+
+
+def make_response_cache_key(request, endpoint: str, version_names: Iterable[str], scope: str = '') -> str:
+    '''
+    응답 cache key를 만드는 함수. 정규화한 query parameter, 호출자 범위(scope), 관련 version으로 만든다.
+    version을 DB 조회보다 먼저 읽어야, 조회 중에 데이터가 바뀌어도 예전 데이터가 새 version으로 저장되지 않는다.
+
+    :param request: drf request
+    :param endpoint: 응답 종류 (ex. post_list)
+    :param version_names: 응답이 의존하는 version 이름 목록
+    :param scope: 호출자에 따라 응답이 다르다면 구분하는 값 (ex. role)
+    :return: cache key
+    '''
+    versions = sorted(get_versions(version_names).items())
+    # 같은 key의 값 순서는 의미가 있을 수 있으므로 key만 정렬
+    params = sorted(request.query_params.lists(), key=lambda x: x[0])
+    version_signature = hashlib.sha1(json.dumps(versions, separators=(',', ':')).encode()).hexdigest()
+    # 같은 요청에서 목록 개수 cache가 같은 version을 사용하도록 남겨둠 (CachedCountPaginator)
+    setattr(getattr(request, '_request', request), 'response_cache_version', version_signature)
+    signature = json.dumps(
+        [request.get_host(), request.path, scope, params, version_signature],
+        separators=(',', ':'), ensure_ascii=False
+    )
+    return f'{constant.RESPONSE_CACHE_PREFIX}:{endpoint}:{hashlib.sha1(signature.encode()).hexdigest()}'
+
+
+def cached_response(key: str, build: Callable[[], Response]) -> Response:
+    '''
+    cache된 응답이 있으면 돌려주고, 없으면 만들어서 200 응답만 cache 하는 함수.
+    cache가 비었을 때 같은 key의 요청이 몰려도 응답은 한 worker만 만든다 (single_flight)
+
+    :param key: make_response_cache_key로 만든 key
+    :param build: 응답을 만드는 함수
+    :return: drf Response
+    '''
+    def load():
+        data = cache.get(key)
+        return None if data is None else Response(data)
+
+    def compute():
+        response = build()
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout=constant.RESPONSE_CACHE_TTL)
+        return response
+
+    return single_flight(key, load, compute)
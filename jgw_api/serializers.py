@@ -105,6 +105,8 @@ class PostWriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = '__all__'
+        # 요약은 저장할 때 본문으로 만들어짐
+        read_only_fields = ('post_excerpt',)
 
 
 class PostGetSerializer(serializers.ModelSerializer):
@@ -121,6 +123,13 @@ class PostGetSerializer(serializers.ModelSerializer):
                   'thumbnail_id_pk', 'board_boadr_id_pk', 'member_member_pk']
 
 
+class PostListSerializer(PostGetSerializer):
+    '''
+    post serializer. 목록 조회에 사용하는 serializer. 본문 대신 저장해둔 요약을 post_content로 보여줌.
+    '''
+    post_content = serializers.CharField(source='post_excerpt', read_only=True)
+
+
 class PostPatchSerializer(serializers.ModelSerializer):
     '''
     post serializer. patch method에 사용하는 serializer.
@@ -129,7 +138,7 @@ class PostPatchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = '__all__'
-        read_only_fields = ('post_write_time', 'member_member_pk')
+        read_only_fields = ('post_write_time', 'member_member_pk', 'post_excerpt')
 
 
 class CommentGetSerializer(serializers.ModelSerializer):
@@ -0,0 +1,76 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Role, Config, GatewayManagementConfig, Board, Post, Member
+from .registry import role_registry, config_registry, board_permission_registry
+from .response_cache import BOARD_LIST_VERSION, MEMBER_VERSION, bump_versions, bump_board_versions
+
+
+@receiver([post_save, post_delete], sender=Role)
+def invalidate_role_registry(sender, **kwargs):
+    # role이 추가/수정/삭제되면 모든 worker의 role registry를 다시 읽게 한다
+    role_registry.invalidate()
+    board_permission_registry.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Config)
+@receiver([post_save, post_delete], sender=GatewayManagementConfig)
+def invalidate_config_registry(sender, **kwargs):
+    # config 값이 바뀌면 모든 worker의 config registry를 다시 읽게 한다
+    config_registry.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Board)
+def invalidate_board_permission_registry(sender, **kwargs):
+    # 게시판이 추가/수정/삭제되면 모든 worker의 게시판 권한 matrix를 다시 읽게 한다
+    board_permission_registry.invalidate()
+
+
+def _saves_board(update_fields) -> bool:
+    return update_fields is None or bool({'board_boadr_id_pk', 'board_boadr_id_pk_id'} & set(update_fields))
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_board(sender, instance, raw=False, update_fields=None, **kwargs):
+    # 게시글이 다른 게시판으로 옮겨지면 예전 게시판의 목록 응답도 무효화해야 하므로 저장 전 게시판을 기억
+    instance._response_cache_old_board = None
+    if raw or instance.pk is None:
+        return
+    if not _saves_board(update_fields):
+        # 게시판을 저장하지 않으므로 게시판이 바뀌지 않음
+        return
+    if hasattr(instance, '_loaded_board_id'):
+        # DB에서 읽은 instance라면 읽을 때의 게시판을 사용해 조회를 한번 줄임
+        instance._response_cache_old_board = instance._loaded_board_id
+        return
+    instance._response_cache_old_board = Post.objects.filter(pk=instance.pk) \
+        .values_list('board_boadr_id_pk', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_board_version(sender, instance, update_fields=None, **kwargs):
+    # 게시글이 추가/수정/삭제되면 소속 게시판의 게시글 목록 응답 cache를 무효화
+    bump_board_versions(instance.board_boadr_id_pk_id, getattr(instance, '_response_cache_old_board', None))
+    if _saves_board(update_fields):
+        # 같은 instance를 다시 저장할 때는 방금 저장한 게시판이 예전 게시판
+        instance._loaded_board_id = instance.board_boadr_id_pk_id
+
+
+@receiver([post_save, post_delete], sender=Board)
+def bump_board_version(sender, instance, **kwargs):
+    # 게시판 정보는 게시판 목록, 해당 게시판 게시글 목록에 모두 보인다
+    bump_board_versions(instance.board_id_pk)
+    bump_versions(BOARD_LIST_VERSION)
+
+
+@receiver([post_save, post_delete], sender=Role)
+def bump_board_list_version(sender, **kwargs):
+    # 게시판 목록은 role 정보를 nested로 보여줌
+    bump_versions(BOARD_LIST_VERSION)
+
+
+@receiver([post_save, post_delete], sender=Member)
+def bump_member_version(sender, **kwargs):
+    # 게시글 목록은 작성자 이름을 nested로 보여줌
+    bump_versions(MEMBER_VERSION)
@@ -0,0 +1,107 @@
+import time
+import uuid
+import threading
+import logging
+
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from django.core.cache import cache
+
+import jgw_api.constant as constant
+
+logger = logging.getLogger('hub_error')
+
+T = TypeVar('T')
+
+# key -> [lock, 사용 중인 thread 수]. 아무도 쓰지 않는 lock은 지워서 key가 계속 쌓이지 않게 한다
+_local_locks: Dict[str, List] = {}
+_local_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _local_lock(key: str, timeout: float):
+    # 같은 프로세스의 thread들은 key마다 lock 하나로 줄 세움. timeout 안에 lock을 얻지 못하면 False
+    with _local_locks_guard:
+        entry = _local_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    acquired = entry[0].acquire(timeout=max(timeout, 0))
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            entry[0].release()
+        with _local_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                _local_locks.pop(key, None)
+
+
+def _lease_key(key: str) -> str:
+    return f'{constant.SINGLE_FLIGHT_LEASE_PREFIX}:{key}'
+
+
+# lease 값이 자신의 token일 때만 지우는 script. 확인과 삭제 사이에 다른 worker가 lease를 가져가도 지우지 않는다
+_RELEASE_LEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+
+def _release_lease(lease_key: str, token: str) -> None:
+    client = getattr(cache, 'client', None)
+    if hasattr(client, 'get_client') and hasattr(client, 'encode'):
+        # django_redis: 확인과 삭제를 script 하나로 atomic 하게 실행
+        client.get_client(write=True).eval(_RELEASE_LEASE_SCRIPT, 1, client.make_key(lease_key), client.encode(token))
+        return
+    # local memory cache는 프로세스 안에서만 공유되고, lease는 key별 local lock을 잡은 thread만 다루므로
+    # 확인과 삭제 사이에 다른 thread가 lease를 가져갈 수 없다
+    if cache.get(lease_key) == token:
+        cache.delete(lease_key)
+
+
+def single_flight(key: str, load: Callable[[], Optional[T]], compute: Callable[[], T]) -> T:
+    '''
+    같은 key의 결과를 여러 요청이 동시에 계산하지 않도록 하나만 계산하고 나머지는 그 결과를 기다리는 함수.
+    프로세스 안에서는 key별 lock으로, 프로세스끼리는 공유 cache의 lease(cache.add)로 계산할 worker를 하나로 정한다.
+    lock이나 lease를 얻지 못한 요청은 합쳐서 SINGLE_FLIGHT_WAIT_TIMEOUT 초 동안만 결과가 cache에 올라오기를 기다리고,
+    그래도 없다면(계산한 worker가 실패했거나 너무 오래 걸림) 직접 계산한다.
+
+    :param key: 결과를 구분하는 key
+    :param load: cache에서 결과를 읽는 함수. 없으면 None
+    :param compute: 결과를 계산해서 cache에 저장하고 돌려주는 함수
+    :return: 계산했거나 cache에서 읽은 결과
+    '''
+    value = load()
+    if value is not None:
+        return value
+
+    deadline = time.monotonic() + constant.SINGLE_FLIGHT_WAIT_TIMEOUT
+    with _local_lock(key, constant.SINGLE_FLIGHT_WAIT_TIMEOUT) as acquired:
+        # 기다리는 동안 같은 프로세스의 다른 thread가 계산했을 수 있음
+        value = load()
+        if value is not None:
+            return value
+        if not acquired:
+            # 같은 프로세스에서 계산 중인 thread가 너무 오래 걸리면 더 기다리지 않고 직접 계산
+            logger.info(f'single flight local wait timeout\tkey: {key}')
+            return compute()
+
+        lease_key = _lease_key(key)
+        token = uuid.uuid4().hex
+        while not cache.add(lease_key, token, timeout=constant.SINGLE_FLIGHT_LEASE_TIMEOUT):
+            # 다른 worker가 계산 중이면 결과가 올라오거나 lease가 풀릴 때까지 잠깐 기다림
+            if time.monotonic() >= deadline:
+                logger.info(f'single flight wait timeout\tkey: {key}')
+                return compute()
+            time.sleep(constant.SINGLE_FLIGHT_POLL_INTERVAL)
+            value = load()
+            if value is not None:
+                return value
+
+        try:
+            # lease를 얻는 사이에 다른 worker가 계산을 끝냈을 수 있음
+            value = load()
+            if value is not None:
+                return value
+            return compute()
+        finally:
+            # lease가 만료되어 다른 worker가 가져간 경우에는 지우지 않음
+            _release_lease(lease_key, token)
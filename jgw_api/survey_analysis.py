@@ -0,0 +1,93 @@
+from typing import List
+
+from bson.objectid import ObjectId
+
+import jgw_api.constant as constant
+
+from .survey_db import SurveyCollections
+
+
+def analyze_survey(
+        collections: SurveyCollections,
+        parent_post: ObjectId,
+        quizzes_data: List[dict],
+        text_page: int,
+        text_page_size: int) -> List[dict]:
+    '''
+    설문의 모든 문항 분석 결과를 한번의 aggregate로 계산하는 함수.
+    답변을 한번만 $unwind 하고 $facet 안에서 응답 수, 선택지별 선택 수를 $group 하고,
+    주관식 답변은 문항마다 $skip, $limit으로 요청한 페이지만 가져온다.
+
+    :param collections: 설문 collection 묶음
+    :param parent_post: 설문 id
+    :param quizzes_data: 설문의 문항 문서 목록 (문항 순서대로)
+    :param text_page: 주관식 답변 페이지 번호
+    :param text_page_size: 주관식 답변 페이지 크기
+    :return: 문항 순서대로 정리된 분석 결과 목록
+    '''
+    text_quiz_ids = [q['_id'] for q in quizzes_data if q['type'] == constant.SURVEY_TEXT_CODE]
+    result = list(collections.answer.aggregate([
+        {'$match': {'parent_post': parent_post}},
+        {'$sort': {'_id': 1}},
+        {'$unwind': '$answers'},
+        {'$facet': {
+            'summary': [
+                {'$group': {
+                    '_id': '$answers.parent_quiz',
+                    'answered': {'$sum': {'$cond': [{'$eq': ['$answers.null', 1]}, 0, 1]}},
+                    'null': {'$sum': {'$cond': [{'$eq': ['$answers.null', 1]}, 1, 0]}},
+                }}
+            ],
+            'options': [
+                {'$match': {'$or': [
+                    {'answers.selection': {'$exists': True}},
+                    {'answers.selections': {'$exists': True}}
+                ]}},
+                # 단일 선택은 값 하나, 복수 선택은 배열. $unwind는 배열이 아닌 값을 원소 하나로 취급
+                {'$project': {
+                    'quiz': '$answers.parent_quiz',
+                    'selected': {'$ifNull': ['$answers.selections', '$answers.selection']}
+                }},
+                {'$unwind': '$selected'},
+                {'$group': {'_id': {'quiz': '$quiz', 'idx': '$selected'}, 'count': {'$sum': 1}}}
+            ],
+            # 주관식 문항마다 요청한 페이지만 꺼냄. 전체 답변을 배열로 모으지 않으므로 답변 수와 관계없이 한 페이지만 메모리에 올라감
+            **{
+                f'text_{i}': [
+                    {'$match': {'answers.parent_quiz': quiz_id, 'answers.text': {'$exists': True}}},
+                    {'$sort': {'_id': 1}},
+                    {'$skip': (text_page - 1) * text_page_size},
+                    {'$limit': text_page_size},
+                    {'$project': {'_id': 0, 'text': '$answers.text'}}
+                ]
+                for i, quiz_id in enumerate(text_quiz_ids)
+            }
+        }}
+    ], allowDiskUse=True))[0]
+
+    summary = {i['_id']: i for i in result['summary']}
+    option_counts = {(i['_id']['quiz'], i['_id']['idx']): i['count'] for i in result['options']}
+    texts = {quiz_id: [i['text'] for i in result[f'text_{idx}']] for idx, quiz_id in enumerate(text_quiz_ids)}
+
+    analyzed = []
+    for q in quizzes_data:
+        quiz_summary = summary.get(q['_id'], {})
+        data = {
+            '_id': str(q['_id']),
+            'title': q['title'],
+            'type': q['type'],
+            'answered': quiz_summary.get('answered', 0),
+            'null': quiz_summary.get('null', 0),
+        }
+        if q['type'] == constant.SURVEY_TEXT_CODE:
+            total_pages = data['answered'] // text_page_size
+            total_pages += 1 if data['answered'] % text_page_size else 0
+            data['total_pages'] = total_pages
+            data['texts'] = texts.get(q['_id'], [])
+        else:
+            data['options'] = [
+                {'idx': idx, 'text': option['text'], 'count': option_counts.get((q['_id'], idx), 0)}
+                for idx, option in enumerate(q['options'])
+            ]
+        analyzed.append(data)
+    return analyzed
@@ -0,0 +1,197 @@
+import os
+import atexit
+import logging
+import threading
+
+from typing import NamedTuple, Optional, List, Tuple
+
+from django.conf import settings
+
+import pymongo
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+import jgw_api.constant as constant
+
+from secrets_content.files.secret_key import SURVEY_DATABASES
+
+logger = logging.getLogger('hub_error')
+
+
+class SurveyCollections(NamedTuple):
+    '''
+    설문 api가 사용하는 collection handle 묶음
+    '''
+    client: pymongo.MongoClient
+    db: pymongo.database.Database
+    survey: pymongo.collection.Collection
+    quiz: pymongo.collection.Collection
+    answer: pymongo.collection.Collection
+    tally: pymongo.collection.Collection
+
+
+# collection 별로 필요한 index 선언. 실제 쿼리 패턴에 맞춰 관리한다
+SURVEY_INDEXES = {
+    # list_post: role 범위 조건 + activate, created_time 정렬
+    constant.SURVEY_POST_DB_NME: [
+        IndexModel([('activate', DESCENDING), ('created_time', DESCENDING), ('role', ASCENDING)],
+                   name='activate_created_time_role'),
+        # list_post: title 부분 일치 검색. 정규식이 고정되지 않아 index 전체를 읽지만 설문 문서를 모두 읽지는 않는다
+        IndexModel([('title', ASCENDING)], name='title'),
+    ],
+    # create_answer, retrieve_post, delete_post: parent_post 조건
+    constant.SURVEY_QUIZ: [
+        IndexModel([('parent_post', ASCENDING), ('_id', ASCENDING)],
+                   name='parent_post_id'),
+    ],
+    constant.SURVEY_ANSWER: [
+        # 로그인한 유저는 설문 하나에 답변 하나. 익명 답변(user: null)은 제외
+        IndexModel([('parent_post', ASCENDING), ('user', ASCENDING)],
+                   name='parent_post_user', unique=True,
+                   partialFilterExpression={'user': {'$type': 'string'}}),
+        # list_answers, delete_post: parent_post 조건 + _id 순서
+        IndexModel([('parent_post', ASCENDING), ('_id', ASCENDING)],
+                   name='parent_post_id'),
+        # 문항별 분석: answers.parent_quiz 조건 (multikey)
+        IndexModel([('answers.parent_quiz', ASCENDING)],
+                   name='answers_parent_quiz'),
+    ],
+    # 문항별 집계. _id는 문항 id, delete_post는 parent_post 조건
+    constant.SURVEY_TALLY: [
+        IndexModel([('parent_post', ASCENDING)], name='parent_post'),
+    ],
+}
+
+
+_lock = threading.Lock()
+_pid: Optional[int] = None
+_collections: Optional[SurveyCollections] = None
+
+
+def _get_database_name() -> str:
+    if not settings.TESTING:
+        return constant.SURVEY_DB_NAME
+    return os.environ.get("TEST_DB_NAME", 'test')
+
+
+def _create_collections() -> SurveyCollections:
+    client = pymongo.MongoClient(SURVEY_DATABASES)
+    db = client.get_database(_get_database_name())
+
+    # collection이 없을 때만 생성. 매 요청마다 create_collection 실패를 기다리지 않도록 한번만 확인
+    existing = set(db.list_collection_names())
+    for name in (constant.SURVEY_POST_DB_NME, constant.SURVEY_QUIZ, constant.SURVEY_ANSWER, constant.SURVEY_TALLY):
+        if name in existing:
+            continue
+        try:
+            db.create_collection(name)
+        except CollectionInvalid:
+            # 다른 프로세스가 먼저 생성한 경우
+            pass
+
+    return SurveyCollections(
+        client=client,
+        db=db,
+        survey=db.get_collection(constant.SURVEY_POST_DB_NME),
+        quiz=db.get_collection(constant.SURVEY_QUIZ),
+        answer=db.get_collection(constant.SURVEY_ANSWER),
+        tally=db.get_collection(constant.SURVEY_TALLY),
+    )
+
+
+def get_survey_collections() -> SurveyCollections:
+    '''
+    프로세스 단위로 공유되는 설문 collection handle을 가져오는 함수.
+    MongoClient는 fork 이후 재사용하면 안되므로 pid가 바뀌면 새로 생성한다.
+
+    :return: 설문 collection handle 묶음
+    '''
+    global _pid, _collections
+    pid = os.getpid()
+    collections = _collections
+    if collections is not None and _pid == pid:
+        return collections
+
+    with _lock:
+        if _collections is None or _pid != pid:
+            # fork 된 자식 프로세스는 부모의 client를 닫지 않고 버린다
+            _collections = _create_collections()
+            _pid = pid
+            logger.debug(f'survey mongo client created\tpid: {pid}')
+        return _collections
+
+
+def ensure_survey_indexes(collections: SurveyCollections = None) -> List[Tuple[str, str]]:
+    '''
+    SURVEY_INDEXES에 선언된 index를 생성하는 함수. 이미 있는 index는 건너뛰므로 여러번 실행해도 된다.
+
+    :param collections: index를 생성할 collection 묶음. 없으면 공유 handle 사용
+    :return: 생성에 실패한 (collection 이름, index 이름) 목록
+    '''
+    if collections is None:
+        collections = get_survey_collections()
+    failed = []
+    for name, indexes in SURVEY_INDEXES.items():
+        collection = collections.db.get_collection(name)
+        for index in indexes:
+            try:
+                collection.create_indexes([index])
+            except OperationFailure as e:
+                # 기존 데이터가 unique 조건을 어기는 경우 등
+                index_name = index.document['name']
+                logger.error(f'create survey index failed\tcollection: {name}\tindex: {index_name}\n\terror: {e}')
+                failed.append((name, index_name))
+    return failed
+
+
+def find_missing_survey_indexes(collections: SurveyCollections = None) -> List[Tuple[str, str]]:
+    '''
+    SURVEY_INDEXES에 선언됐지만 collection에 없는 index를 찾는 함수.
+    index 이름이 달라도 key 구성이 같으면 있는 것으로 본다.
+
+    :param collections: 확인할 collection 묶음. 없으면 공유 handle 사용
+    :return: 없는 (collection 이름, index 이름) 목록
+    '''
+    if collections is None:
+        collections = get_survey_collections()
+    missing = []
+    for name, indexes in SURVEY_INDEXES.items():
+        information = collections.db.get_collection(name).index_information()
+        existing_keys = {tuple((k, int(d)) for k, d in info['key']) for info in information.values()}
+        for index in indexes:
+            document = index.document
+            keys = tuple((k, int(d)) for k, d in document['key'].items())
+            if keys not in existing_keys:
+                missing.append((name, document['name']))
+    return missing
+
+
+def warm_up_survey_client() -> None:
+    '''
+    worker 시작 시점에 mongo 연결을 미리 맺어두는 함수.
+    첫 요청이 server handshake 비용을 부담하지 않도록 하고, 없는 index가 있으면 기록한다.
+    '''
+    collections = get_survey_collections()
+    try:
+        collections.client.admin.command('ping')
+        logger.debug(f'survey mongo client warmed up\tpid: {os.getpid()}')
+        for name, index_name in find_missing_survey_indexes(collections):
+            logger.warning(f'survey index missing\tcollection: {name}\tindex: {index_name}')
+    except Exception as e:
+        logger.error(f'survey mongo client warm up failed.\n\terror: {e}')
+
+
+def close_survey_client() -> None:
+    '''
+    현재 프로세스가 만든 mongo client를 닫는 함수
+    '''
+    global _pid, _collections
+    with _lock:
+        if _collections is not None and _pid == os.getpid():
+            _collections.client.close()
+            logger.debug(f'survey mongo client closed\tpid: {_pid}')
+        _collections = None
+        _pid = None
+
+
+atexit.register(close_survey_client)
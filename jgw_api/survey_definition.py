@@ -0,0 +1,146 @@
+import time
+import threading
+
+from typing import NamedTuple, Optional, Tuple, Dict, List
+
+from bson.objectid import ObjectId
+
+import jgw_api.constant as constant
+
+from .survey_db import SurveyCollections
+
+
+class QuizDefinition(NamedTuple):
+    '''
+    답변 검증에 필요한 값만 미리 꺼내둔 문항 정의
+    '''
+    id: ObjectId
+    type: int
+    require: int
+    option_count: int
+    doc: dict
+
+
+class SurveyDefinition(NamedTuple):
+    '''
+    설문 문서와 순서대로 정렬된 문항 정의
+    '''
+    id: ObjectId
+    role: int
+    doc: dict
+    quizzes: Tuple[QuizDefinition, ...]
+
+
+_lock = threading.Lock()
+_cache: Dict[str, Tuple[float, SurveyDefinition]] = {}
+
+
+def _load_survey_definition(collections: SurveyCollections, pk: str) -> Optional[SurveyDefinition]:
+    # answer_count는 답변마다 바뀌므로 정의에 포함하지 않음
+    survey_data = collections.survey.find_one({'_id': ObjectId(pk)}, {'answer_count': 0})
+    if survey_data is None:
+        return None
+    quizzes_data = collections.quiz.find({'parent_post': survey_data['_id']}).sort('_id', 1)
+    quizzes = tuple(
+        QuizDefinition(
+            id=q['_id'],
+            type=int(q['type']),
+            require=int(q['require']),
+            option_count=len(q.get('options', ())),
+            doc=q
+        )
+        for q in quizzes_data
+    )
+    return SurveyDefinition(
+        id=survey_data['_id'],
+        role=int(survey_data['role']),
+        doc=survey_data,
+        quizzes=quizzes
+    )
+
+
+def get_survey_definition(collections: SurveyCollections, pk: str) -> Optional[SurveyDefinition]:
+    '''
+    설문 정의를 프로세스 내 캐시에서 가져오는 함수. 없거나 만료됐으면 mongo에서 다시 읽는다.
+    캐시된 정의는 여러 요청이 공유하므로 수정하면 안된다.
+
+    :param collections: 설문 collection 묶음
+    :param pk: 설문 id
+    :return: 설문 정의. 설문이 없으면 None
+    '''
+    now = time.monotonic()
+    cached = _cache.get(pk)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    definition = _load_survey_definition(collections, pk)
+    if definition is None:
+        # 없는 설문은 캐시하지 않음
+        return None
+
+    with _lock:
+        if len(_cache) >= constant.SURVEY_DEFINITION_CACHE_SIZE:
+            # 만료된 항목부터 정리하고, 그래도 가득 차 있으면 가장 먼저 만료될 항목 제거
+            for key in [k for k, v in _cache.items() if v[0] <= now]:
+                del _cache[key]
+            if len(_cache) >= constant.SURVEY_DEFINITION_CACHE_SIZE:
+                del _cache[min(_cache, key=lambda k: _cache[k][0])]
+        _cache[pk] = (now + constant.SURVEY_DEFINITION_CACHE_TTL, definition)
+    return definition
+
+
+def invalidate_survey_definition(pk: str) -> None:
+    '''
+    설문이 수정/삭제됐을 때 캐시된 정의를 지우는 함수.
+    다른 worker의 캐시는 TTL이 지나면 갱신된다.
+
+    :param pk: 설문 id
+    '''
+    with _lock:
+        _cache.pop(pk, None)
+
+
+def build_answers(definition: SurveyDefinition, answers: List[dict]) -> List[dict]:
+    '''
+    요청받은 답변을 설문 정의로 검증하고 저장할 형식으로 바꾸는 함수. mongo 조회 없이 검증한다.
+
+    :param definition: 설문 정의
+    :param answers: 요청받은 답변 목록 (문항 순서대로)
+    :return: 저장할 답변 목록. 검증에 실패하면 AssertionError
+    '''
+    assert len(answers) == len(definition.quizzes), "The number of responses must equal the number of questions."
+
+    built = []
+    for idx, q in enumerate(definition.quizzes):
+        a = answers[idx]
+        type = int(a['type'])
+        assert q.type == type, f'The data format of the response is different from the question. idx" {idx}'
+
+        answer = {
+            "parent_quiz": q.id
+        }
+
+        if 'null' in a:
+            if q.require == 0 and int(a['null']) == 1:
+                answer['null'] = 1
+                built.append(answer)
+                continue
+            elif q.require == 1 and int(a['null']) == 1:
+                assert False, 'Required response questions must be answered.'
+
+        # create answer
+        if type == constant.SURVEY_TEXT_CODE:
+            answer['text'] = a['text']
+        elif type == constant.SURVEY_SELECT_ONE_CODE:
+            selection = int(a['selection'])
+            assert 0 <= selection < q.option_count, 'An option that does not exist.'
+            answer['selection'] = selection
+        elif type == constant.SURVEY_SELECT_MULTIPLE_CODE:
+            selections = sorted(set(map(int, a['selections'])))
+            assert len(selections) > 0, 'There must be at least one option selected.'
+            assert selections[0] >= 0 and selections[-1] < q.option_count, 'An option that does not exist.'
+            answer['selections'] = selections
+        else:
+            assert False, f'{type} is a non-existent answer type.'
+        built.append(answer)
+    return built
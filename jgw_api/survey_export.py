@@ -0,0 +1,104 @@
+import csv
+import json
+
+from typing import Any, Iterator, List
+
+from bson.objectid import ObjectId
+
+import jgw_api.constant as constant
+
+from .survey_db import SurveyCollections
+
+
+class _Echo:
+    '''
+    csv.writer가 쓴 한 줄을 그대로 돌려주는 버퍼. 응답 전체를 메모리에 쌓지 않기 위해 사용
+    '''
+    def write(self, value):
+        return value
+
+
+def _iter_answers(collections: SurveyCollections, parent_post: ObjectId) -> Iterator[dict]:
+    # batch 단위로 가져오는 cursor. 한번에 batch 크기만큼만 메모리에 올라온다
+    cursor = collections.answer.find({'parent_post': parent_post}, {'parent_post': 0}) \
+        .sort('_id', 1) \
+        .batch_size(constant.SURVEY_EXPORT_BATCH_SIZE)
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+def _csv_cell(value: Any) -> str:
+    # 예전 답변에는 숫자나 None이 저장된 경우가 있어 문자열로 맞춘다. 응답 도중 에러가 나면 파일이 잘리므로 여기서 처리
+    value = '' if value is None else str(value)
+    # excel이 수식으로 해석하지 않도록 수식 시작 문자로 시작하는 값 앞에 ' 를 붙인다
+    if value and value[0] in constant.CSV_FORMULA_PREFIXES:
+        return "'" + value
+    return value
+
+
+def _answer_value(quiz_data: dict, answer: dict) -> Any:
+    # 문항 형식에 맞게 답변을 문자열로 변환. 선택지는 번호 대신 선택지 내용을 사용
+    if answer.get('null'):
+        return ''
+    if 'text' in answer:
+        return answer['text']
+    if 'selection' in answer:
+        return quiz_data['options'][answer['selection']]['text']
+    if 'selections' in answer:
+        return '|'.join(str(quiz_data['options'][i]['text']) for i in answer['selections'])
+    return ''
+
+
+def iter_answers_csv(
+        collections: SurveyCollections,
+        parent_post: ObjectId,
+        quizzes_data: List[dict]) -> Iterator[str]:
+    '''
+    설문 답변을 csv 한 줄씩 만들어주는 generator
+
+    :param collections: 설문 collection 묶음
+    :param parent_post: 설문 id
+    :param quizzes_data: 설문의 문항 문서 목록. 열 순서와 제목으로 사용
+    :return: csv 한 줄씩 반환하는 iterator
+    '''
+    writer = csv.writer(_Echo())
+    quizzes = {q['_id']: q for q in quizzes_data}
+    columns = {q['_id']: idx for idx, q in enumerate(quizzes_data)}
+
+    # excel에서 한글이 깨지지 않도록 BOM을 붙인다
+    yield '\ufeff' + writer.writerow(['_id', 'user'] + [_csv_cell(q['title']) for q in quizzes_data])
+    for answer_data in _iter_answers(collections, parent_post):
+        row = [''] * len(quizzes_data)
+        for a in answer_data['answers']:
+            if a['parent_quiz'] in columns:
+                row[columns[a['parent_quiz']]] = _csv_cell(_answer_value(quizzes[a['parent_quiz']], a))
+        yield writer.writerow([str(answer_data['_id']), _csv_cell(answer_data['user'])] + row)
+
+
+def iter_answers_ndjson(
+        collections: SurveyCollections,
+        parent_post: ObjectId,
+        quizzes_data: List[dict]) -> Iterator[str]:
+    '''
+    설문 답변을 json 한 줄씩(ndjson) 만들어주는 generator
+
+    :param collections: 설문 collection 묶음
+    :param parent_post: 설문 id
+    :param quizzes_data: 설문의 문항 문서 목록. 문항 제목으로 사용
+    :return: json 한 줄씩 반환하는 iterator
+    '''
+    titles = {q['_id']: q['title'] for q in quizzes_data}
+    for answer_data in _iter_answers(collections, parent_post):
+        answers = []
+        for a in answer_data['answers']:
+            answer = {k: v for k, v in a.items() if k != 'parent_quiz'}
+            answer['parent_quiz'] = str(a['parent_quiz'])
+            answer['title'] = titles.get(a['parent_quiz'])
+            answers.append(answer)
+        yield json.dumps({
+            '_id': str(answer_data['_id']),
+            'user': answer_data['user'],
+            'answers': answers
+        }, ensure_ascii=False) + '\n'
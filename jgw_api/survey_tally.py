@@ -0,0 +1,171 @@
+import logging
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from bson.objectid import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+
+from .survey_db import SurveyCollections, get_survey_collections
+
+logger = logging.getLogger('hub_error')
+
+# 문항별 선택지 집계 문서 형식 (survey_tally collection)
+# {
+#     '_id': 문항 id,
+#     'parent_post': 설문 id,
+#     'answered': 응답(null 제외) 수,
+#     'null': null 응답 수,
+#     'options': {'0': 선택 수, '1': 선택 수, ...}
+# }
+
+
+def _answer_deltas(answer_data: Optional[dict], sign: int, deltas: Dict[ObjectId, Dict[str, int]]) -> None:
+    # 답변 하나가 각 문항 집계에 더하거나(sign=1) 빼야(sign=-1) 하는 값을 누적
+    if answer_data is None:
+        return
+    for a in answer_data['answers']:
+        quiz_deltas = deltas[a['parent_quiz']]
+        if a.get('null'):
+            quiz_deltas['null'] += sign
+            continue
+        quiz_deltas['answered'] += sign
+        if 'selection' in a:
+            quiz_deltas[f'options.{a["selection"]}'] += sign
+        elif 'selections' in a:
+            for selection in a['selections']:
+                quiz_deltas[f'options.{selection}'] += sign
+
+
+def apply_answer_tally(
+        collections: SurveyCollections,
+        parent_post: ObjectId,
+        new_answer: Optional[dict] = None,
+        old_answer: Optional[dict] = None) -> None:
+    '''
+    답변 추가/변경에 맞춰 문항별 집계와 설문 답변 수를 $inc로 갱신하는 함수.
+    다시 답변한 경우 이전 답변만큼 빼고 새 답변만큼 더한다.
+
+    :param collections: 설문 collection 묶음
+    :param parent_post: 설문 id
+    :param new_answer: 새로 저장된 답변 문서
+    :param old_answer: 대체되거나 삭제된 이전 답변 문서
+    '''
+    apply_answers_tally(
+        collections,
+        parent_post,
+        [] if new_answer is None else [new_answer],
+        [] if old_answer is None else [old_answer]
+    )
+
+
+def apply_answers_tally(
+        collections: SurveyCollections,
+        parent_post: ObjectId,
+        new_answers: List[dict],
+        old_answers: List[dict]) -> None:
+    '''
+    여러 답변의 집계 변화를 한번에 모아서 갱신하는 함수. 문항마다 update 하나, 설문 답변 수 update 하나만 보낸다.
+
+    :param collections: 설문 collection 묶음
+    :param parent_post: 설문 id
+    :param new_answers: 새로 저장된 답변 문서 목록
+    :param old_answers: 대체되거나 삭제된 이전 답변 문서 목록
+    '''
+    if collections.survey.count_documents({'_id': parent_post, 'answer_count': {'$exists': False}}, limit=1):
+        # answer_count가 없는 예전 설문은 $inc가 0부터 세게 되므로, 처음 한번은 저장된 답변으로 집계를 다시 만든다.
+        # 이번 답변은 이미 저장되어 있으므로 다시 만든 집계에 포함된다
+        rebuild_survey_tally(parent_post, collections)
+        return
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    for answer_data in new_answers:
+        _answer_deltas(answer_data, 1, deltas)
+    for answer_data in old_answers:
+        _answer_deltas(answer_data, -1, deltas)
+
+    operations = []
+    for quiz_id, quiz_deltas in deltas.items():
+        inc = {k: v for k, v in quiz_deltas.items() if v}
+        if not inc:
+            continue
+        operations.append(UpdateOne(
+            {'_id': quiz_id},
+            {'$inc': inc, '$setOnInsert': {'parent_post': parent_post}},
+            upsert=True
+        ))
+    if operations:
+        collections.tally.bulk_write(operations, ordered=False)
+
+    # 설문 문서의 답변 수. 새 답변만큼 +, 대체되거나 삭제된 답변만큼 -
+    count_delta = len(new_answers) - len(old_answers)
+    if count_delta:
+        collections.survey.update_one({'_id': parent_post}, {'$inc': {'answer_count': count_delta}})
+
+
+def get_answer_count(collections: SurveyCollections, parent_post: ObjectId) -> int:
+    '''
+    설문의 답변 수를 가져오는 함수. 설문 문서에 저장된 값을 읽으므로 답변 수와 관계없이 O(1).
+    answer_count가 없는 예전 설문은 index를 사용해 직접 센다.
+
+    :param collections: 설문 collection 묶음
+    :param parent_post: 설문 id
+    :return: 설문의 답변 수
+    '''
+    survey_data = collections.survey.find_one({'_id': parent_post}, {'answer_count': 1})
+    if survey_data is not None and 'answer_count' in survey_data:
+        return survey_data['answer_count']
+    return collections.answer.count_documents({'parent_post': parent_post})
+
+
+def read_option_tally(collections: SurveyCollections, quiz_data: dict) -> List[dict]:
+    '''
+    선택형 문항의 선택지별 집계를 가져오는 함수
+
+    :param collections: 설문 collection 묶음
+    :param quiz_data: 문항 문서
+    :return: [{'idx': 선택지 번호, 'text': 선택지 내용, 'count': 선택 수}, ...]
+    '''
+    tally = collections.tally.find_one({'_id': quiz_data['_id']}, {'options': 1}) or {}
+    counts = tally.get('options', {})
+    return [
+        {'idx': idx, 'text': option['text'], 'count': counts.get(str(idx), 0)}
+        for idx, option in enumerate(quiz_data['options'])
+    ]
+
+
+def rebuild_survey_tally(parent_post: ObjectId, collections: SurveyCollections = None) -> int:
+    '''
+    설문 하나의 문항별 집계와 답변 수를 저장된 답변으로부터 다시 계산하는 함수
+
+    :param parent_post: 설문 id
+    :param collections: 설문 collection 묶음. 없으면 공유 handle 사용
+    :return: 집계에 사용된 답변 수
+    '''
+    if collections is None:
+        collections = get_survey_collections()
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    answer_count = 0
+    for answer_data in collections.answer.find({'parent_post': parent_post}, {'answers': 1}).batch_size(500):
+        _answer_deltas(answer_data, 1, deltas)
+        answer_count += 1
+
+    tallies = []
+    for quiz in collections.quiz.find({'parent_post': parent_post}, {'_id': 1}):
+        quiz_deltas = deltas.get(quiz['_id'], {})
+        tallies.append({
+            '_id': quiz['_id'],
+            'parent_post': parent_post,
+            'answered': quiz_deltas.get('answered', 0),
+            'null': quiz_deltas.get('null', 0),
+            'options': {k.split('.', 1)[1]: v for k, v in quiz_deltas.items() if k.startswith('options.')},
+        })
+
+    # 동시에 다시 만들어도 같은 결과가 되도록 문항별로 덮어쓰고, 없어진 문항의 집계만 지운다
+    collections.tally.delete_many({'parent_post': parent_post, '_id': {'$nin': [t['_id'] for t in tallies]}})
+    if tallies:
+        collections.tally.bulk_write([ReplaceOne({'_id': t['_id']}, t, upsert=True) for t in tallies], ordered=False)
+    collections.survey.update_one({'_id': parent_post}, {'$set': {'answer_count': answer_count}})
+    logger.debug(f'survey tally rebuilt\tkey: {parent_post}\tanswer count: {answer_count}')
+    return answer_count
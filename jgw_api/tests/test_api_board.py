@@ -1,4 +1,5 @@
 from rest_framework.test import APITestCase
+from django.core.cache import cache
 from rest_framework import status
 from rest_framework.response import Response
 from jgw_api.models import (
@@ -6,6 +7,8 @@ from jgw_api.models import (
     Role,
     Config
 )
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
 import random
 
 
@@ -14,6 +17,8 @@ class BoardApiTestOK(APITestCase):
     databases = '__all__'
     def setUp(self):
         self.url = '/hub/api/v1/board/'
+        # 목록 개수 cache가 다른 테스트 데이터의 개수를 돌려주지 않도록 비움
+        cache.clear()
 
     @classmethod
     def setUpTestData(cls):
@@ -75,6 +80,68 @@ class BoardApiTestOK(APITestCase):
         self.assertEqual(respons.status_code, status.HTTP_200_OK)
         self.assertJSONEqual(respons.content, return_data)
 
+    def test_board_get_total(self):
+        print("Board Api GET ALL include_total Running...")
+
+        # given
+        for i in range(15):
+            Board.objects.create(
+                board_name=f'개수{i}',
+                board_layout=0,
+                role_role_pk_write_level=Role.objects.get(role_pk=0),
+                role_role_pk_read_level=Role.objects.get(role_pk=0),
+                role_role_pk_comment_write_level=Role.objects.get(role_pk=0)
+            )
+
+        # when
+        with CaptureQueriesContext(connections['jgw_api']) as no_total_queries:
+            respons_no_total: Response = self.client.get(self.url, data={'page': 1, 'include_total': 0}, **self.__make_header())
+        respons_total: Response = self.client.get(self.url, data={'page': 1}, **self.__make_header())
+        with CaptureQueriesContext(connections['jgw_api']) as cached_queries:
+            respons_cached: Response = self.client.get(self.url, data={'page': 2}, **self.__make_header())
+
+        # then
+        self.assertEqual(respons_no_total.status_code, status.HTTP_200_OK)
+        self.assertIsNone(respons_no_total.json()['total_pages'])
+        self.assertEqual(respons_no_total.json()['next'], 'http://testserver/hub/api/v1/board/?include_total=0&page=2')
+        self.assertEqual(respons_total.json()['total_pages'], 2)
+        self.assertEqual(respons_cached.json()['total_pages'], 2)
+        self.assertFalse([q for q in no_total_queries.captured_queries if 'COUNT(' in q['sql']])
+        self.assertFalse([q for q in cached_queries.captured_queries if 'COUNT(' in q['sql']])
+
+    def test_board_get_response_cache(self):
+        print("Board Api GET ALL response cache Running...")
+
+        # given
+        Board.objects.create(
+            board_name='캐시1',
+            board_layout=0,
+            role_role_pk_write_level=Role.objects.get(role_pk=0),
+            role_role_pk_read_level=Role.objects.get(role_pk=0),
+            role_role_pk_comment_write_level=Role.objects.get(role_pk=0)
+        )
+        respons_first: Response = self.client.get(self.url, data={'page': 1}, **self.__make_header())
+
+        # when
+        with CaptureQueriesContext(connections['jgw_api']) as cached_queries:
+            respons_cached: Response = self.client.get(self.url, data={'page': 1}, **self.__make_header())
+        Board.objects.create(
+            board_name='캐시2',
+            board_layout=0,
+            role_role_pk_write_level=Role.objects.get(role_pk=0),
+            role_role_pk_read_level=Role.objects.get(role_pk=0),
+            role_role_pk_comment_write_level=Role.objects.get(role_pk=0)
+        )
+        respons_changed: Response = self.client.get(self.url, data={'page': 1}, **self.__make_header())
+
+        # then
+        self.assertEqual(respons_cached.json(), respons_first.json())
+        self.assertFalse(cached_queries.captured_queries)
+        self.assertEqual(
+            [i['board_name'] for i in respons_changed.json()['results']],
+            list(Board.objects.order_by('board_id_pk').values_list('board_name', flat=True))
+        )
+
     def test_board_get_by_id(self):
         print("Board Api GET BY ID Running...")
 
@@ -219,6 +286,8 @@ class BoardApiError(APITestCase):
     databases = '__all__'
     def setUp(self):
         self.url = '/hub/api/v1/board/'
+        # 목록 개수 cache가 다른 테스트 데이터의 개수를 돌려주지 않도록 비움
+        cache.clear()
 
     @classmethod
     def setUpTestData(cls):
@@ -17,6 +17,7 @@ from django.utils.crypto import get_random_string
 from jgw_api.views import post_get_all_query
 
 import os
+import math
 import base64
 import random
 import datetime
@@ -89,6 +90,7 @@ class CommentApiTestOK(APITestCase):
                 post_content=get_random_string(length=500) + str(i),
                 post_write_time=now,
                 post_update_time=now,
+                thumbnail_id_pk=0,
                 board_boadr_id_pk=board_instance,
                 member_member_pk=member_instance
             )
@@ -171,6 +173,33 @@ class CommentApiTestOK(APITestCase):
         self.assertEqual(respons.status_code, status.HTTP_200_OK)
         self.assertJSONEqual(respons.content, return_data)
 
+    def test_comment_get_total_after_create(self):
+        print("Comment Api GET ALL total after create Running...")
+
+        # given
+        data = {'post_id': 2, 'page': 1, 'page_size': 3}
+        post_instance = Post.objects.get(post_id_pk=2)
+        before = self.client.get(self.url, data=data)
+
+        # when
+        for _ in range(2):
+            Comment.objects.create(
+                comment_depth=0,
+                comment_content='new comment',
+                comment_delete=0,
+                post_post_id_pk=post_instance,
+                member_member_pk=Member.objects.first(),
+                comment_comment_id_ref=None
+            )
+        respons: Response = self.client.get(self.url, data=data)
+        respons_last: Response = self.client.get(self.url, data={**data, 'page': respons.json()['total_pages']})
+
+        # then
+        total_count = Comment.objects.filter(post_post_id_pk=post_instance, comment_comment_id_ref=None).count()
+        self.assertEqual(before.json()['total_pages'], math.ceil((total_count - 2) / 3))
+        self.assertEqual(respons.json()['total_pages'], math.ceil(total_count / 3))
+        self.assertEqual(respons_last.status_code, status.HTTP_200_OK)
+
     def test_comment_post(self):
         print("Comment Api POST Running...")
 
@@ -1,4 +1,8 @@
 from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
 from rest_framework import status
 from rest_framework.response import Response
 from jgw_api.models import (
@@ -15,13 +19,19 @@ from jgw_api.models import (
 from django.utils.crypto import get_random_string
 
 from jgw_api.views import post_get_all_query
+from jgw_api.post_filter import compile_post_filter
+from jgw_api.post_search import filter_post_search
+from jgw_api.response_cache import board_version, get_versions
 
+import io
 import os
 import base64
 import random
 import datetime
 import traceback
 
+from unittest import mock
+
 import jgw_api.constant as constant
 
 class PostApiTestOK(APITestCase):
@@ -31,6 +41,8 @@ class PostApiTestOK(APITestCase):
 
     def setUp(self):
         self.url = '/hub/api/v1/post/'
+        # 목록 개수 cache가 다른 테스트 데이터의 개수를 돌려주지 않도록 비움
+        cache.clear()
         # self.now = datetime.datetime.now()
 
     @classmethod
@@ -91,10 +103,19 @@ class PostApiTestOK(APITestCase):
                 post_content=get_random_string(length=500) + str(i),
                 post_write_time=now,
                 post_update_time=now,
+                thumbnail_id_pk=0,
                 board_boadr_id_pk=board_instance,
                 member_member_pk=member_instance
             )
 
+    def __get_list_header(self):
+        # 게시판 읽기 레벨(ROLE_USER1) 이상인 유저로 목록 요청
+        member_instance = Member.objects.filter(role_role_pk__role_nm='ROLE_USER1').first()
+        return {
+            'HTTP_USER_PK': member_instance.member_pk,
+            'HTTP_ROLE_PK': member_instance.role_role_pk_id
+        }
+
     def __get_responses_data_pagenation(self, instance, query_parameters, url, total_count):
         next = previous = None
         page_size = 10
@@ -129,7 +150,7 @@ class PostApiTestOK(APITestCase):
             'post_content': instance.post_content,
             'post_write_time': instance.post_write_time.strftime('%Y-%m-%dT%H:%M:%S.%f'),
             'post_update_time': instance.post_update_time.strftime('%Y-%m-%dT%H:%M:%S.%f'),
-            "image_image_id_pk": instance.image_image_id_pk,
+            'thumbnail_id_pk': instance.thumbnail_id_pk,
             'board_boadr_id_pk': {
                 'board_id_pk': instance.board_boadr_id_pk.board_id_pk,
                 'board_name': instance.board_boadr_id_pk.board_name,
@@ -156,12 +177,12 @@ class PostApiTestOK(APITestCase):
         query_parameters = {
             'page': page,
             'page_size': page_size,
-            'order': random.choice(post._meta.fields).name,
+            'order': random.choice(constant.POST_ORDER_FIELDS),
             'desc': random.randint(0, 1),
         }
 
         # when
-        respons: Response = self.client.get(self.url + 'list/', data=query_parameters)
+        respons: Response = self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
 
         # then
         instance = post_get_all_query(query_parameters, Post.objects.all())
@@ -195,12 +216,12 @@ class PostApiTestOK(APITestCase):
             ),
             'page_size': page_size,
             'page': page,
-            'order': random.choice(post._meta.fields).name,
+            'order': random.choice(constant.POST_ORDER_FIELDS),
             'desc': random.randint(0, 1),
         }
 
         # when
-        respons: Response = self.client.get(self.url + 'list/', data=query_parameters)
+        respons: Response = self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
 
         # then
         instance = post_get_all_query(query_parameters, Post.objects.all())
@@ -231,14 +252,14 @@ class PostApiTestOK(APITestCase):
         # given
         query_parameters = {
             'board': board.board_id_pk,
-            'order': random.choice(post._meta.fields).name,
+            'order': random.choice(constant.POST_ORDER_FIELDS),
             'desc': random.randint(0, 1),
             'page_size': page_size,
             'page': page,
         }
 
         # when
-        respons: Response = self.client.get(self.url + 'list/', data=query_parameters)
+        respons: Response = self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
 
         # then
         instance = post_get_all_query(query_parameters, Post.objects.all())
@@ -271,14 +292,14 @@ class PostApiTestOK(APITestCase):
                 length=1,
                 allowed_chars=''.join([chr(i) for i in range(ord('A'), ord('z') + 1) if not (ord('Z') < i < ord('a'))])
             ),
-            'order': random.choice(post._meta.fields).name,
+            'order': random.choice(constant.POST_ORDER_FIELDS),
             'desc': random.randint(0, 1),
             'page_size': page_size,
             'page': page,
         }
 
         # when
-        respons: Response = self.client.get(self.url + 'list/', data=query_parameters)
+        respons: Response = self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
 
         # then
         instance = post_get_all_query(query_parameters, Post.objects.all())
@@ -309,14 +330,14 @@ class PostApiTestOK(APITestCase):
         # given
         query_parameters = {
             'writer_uid': member.member_pk,
-            'order': random.choice(post._meta.fields).name,
+            'order': random.choice(constant.POST_ORDER_FIELDS),
             'desc': random.randint(0, 1),
             'page_size': page_size,
             'page': page,
         }
 
         # when
-        respons: Response = self.client.get(self.url + 'list/', data=query_parameters)
+        respons: Response = self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
 
         # then
         instance = post_get_all_query(query_parameters, Post.objects.all())
@@ -351,14 +372,14 @@ class PostApiTestOK(APITestCase):
         query_parameters = {
             'start_date': start.strftime('%Y-%m-%dT%H-%M-%S'),
             'end_date': end.strftime('%Y-%m-%dT%H-%M-%S'),
-            'order': random.choice(post._meta.fields).name,
+            'order': random.choice(constant.POST_ORDER_FIELDS),
             'desc': random.randint(0, 1),
             'page_size': page_size,
             'page': page,
         }
 
         # when
-        respons: Response = self.client.get(self.url + 'list/', data=query_parameters)
+        respons: Response = self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
 
         # then
         instance = post_get_all_query(query_parameters, Post.objects.all())
@@ -377,6 +398,240 @@ class PostApiTestOK(APITestCase):
         self.assertEqual(respons.status_code, status.HTTP_200_OK)
         self.assertJSONEqual(respons.content, return_data)
 
+    def test_post_get_all_not_readable(self):
+        print("Post Api GET ALL NOT READABLE Running...")
+
+        # given
+        query_parameters = {'page': 1}
+
+        # when
+        respons: Response = self.client.get(self.url + 'list/', data=query_parameters)
+        respons_guest: Response = self.client.get(self.url + 'list/', data=query_parameters, HTTP_USER_PK='guest', HTTP_ROLE_PK=0)
+
+        # then
+        self.assertEqual(respons.status_code, status.HTTP_200_OK)
+        self.assertEqual(respons.json()['results'], [])
+        self.assertEqual(respons_guest.json()['results'], [])
+
+    def test_post_get_all_cursor(self):
+        print("Post Api GET ALL CURSOR Running...")
+
+        # given
+        page_size = 25
+        expected = list(Post.objects.order_by('-post_write_time', '-post_id_pk').values_list('post_id_pk', flat=True))
+
+        # when
+        pages = []
+        url = self.url + 'list/'
+        query_parameters = {'pagination': 'cursor', 'page_size': page_size, 'desc': 1}
+        while url is not None:
+            respons: Response = self.client.get(url, data=query_parameters, **self.__get_list_header())
+            self.assertEqual(respons.status_code, status.HTTP_200_OK)
+            pages.append(respons.json())
+            url, query_parameters = pages[-1]['next'], None
+        respons_previous: Response = self.client.get(pages[1]['previous'], **self.__get_list_header())
+        respons_invalid: Response = self.client.get(self.url + 'list/', data={'cursor': 'invalid'}, **self.__get_list_header())
+
+        # then
+        self.assertEqual([i['post_id_pk'] for page in pages for i in page['results']], expected)
+        self.assertIsNone(pages[0]['previous'])
+        self.assertNotIn('total_pages', pages[0])
+        self.assertEqual(respons_previous.json()['results'], pages[0]['results'])
+        self.assertEqual(respons_invalid.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_post_get_all_query_count(self):
+        print("Post Api GET ALL QUERY COUNT Running...")
+
+        # given
+        query_counts = []
+        # 권한 registry를 미리 읽어두고, 개수 cache의 영향을 없애기 위해 include_total=0 으로 요청
+        self.client.get(self.url + 'list/', data={'include_total': 0}, **self.__get_list_header())
+
+        # when
+        for page_size in (10, 50):
+            with CaptureQueriesContext(connections['jgw_api']) as queries:
+                respons: Response = self.client.get(self.url + 'list/', data={'page': 1, 'page_size': page_size, 'include_total': 0}, **self.__get_list_header())
+            self.assertEqual(respons.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(respons.json()['results']), page_size)
+            query_counts.append(len(queries.captured_queries))
+
+        # then
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_post_get_all_excerpt(self):
+        print("Post Api GET ALL EXCERPT Running...")
+
+        # given
+        post = Post.objects.order_by('post_write_time').first()
+        post.post_content = get_random_string(length=2000)
+        post.save()
+        # 요약 컬럼이 생기기 전에 만들어진 게시글
+        Post.objects.update(post_excerpt='')
+
+        # when
+        call_command('backfill_post_excerpts', stdout=io.StringIO())
+        with CaptureQueriesContext(connections['jgw_api']) as queries:
+            respons: Response = self.client.get(self.url + 'list/', data={'page': 1, 'page_size': 1}, **self.__get_list_header())
+
+        # then
+        self.assertEqual(respons.status_code, status.HTTP_200_OK)
+        for instance in Post.objects.all():
+            self.assertEqual(instance.post_excerpt, instance.post_content[:constant.POST_EXCERPT_LENGTH])
+        self.assertEqual(respons.json()['results'][0]['post_content'], post.post_content[:constant.POST_EXCERPT_LENGTH])
+        # 목록 조회는 본문 컬럼을 읽지 않음
+        for query in queries.captured_queries:
+            self.assertNotIn('POST_CONTENT', query['sql'])
+
+    def test_post_get_all_response_cache(self):
+        print("Post Api GET ALL response cache Running...")
+
+        # given
+        boards = list(Board.objects.order_by('board_id_pk')[:2])
+        query_parameters = {'board': boards[0].board_id_pk, 'page_size': 100}
+        self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
+
+        # when
+        with CaptureQueriesContext(connections['jgw_api']) as cached_queries:
+            respons_cached: Response = self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
+        # 다른 게시판의 게시글이 바뀌어도 cache는 그대로 사용
+        other = Post.objects.filter(board_boadr_id_pk=boards[1]).first()
+        other.post_title = '다른 게시판'
+        other.save()
+        with CaptureQueriesContext(connections['jgw_api']) as other_queries:
+            self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
+        # 같은 게시판으로 옮겨지면 새로 조회
+        other.board_boadr_id_pk = boards[0]
+        other.save()
+        respons_changed: Response = self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
+
+        # then
+        self.assertEqual(respons_cached.status_code, status.HTTP_200_OK)
+        self.assertFalse(cached_queries.captured_queries)
+        self.assertFalse(other_queries.captured_queries)
+        self.assertIn(other.post_id_pk, [i['post_id_pk'] for i in respons_changed.json()['results']])
+        self.assertEqual(
+            len(respons_changed.json()['results']),
+            Post.objects.filter(board_boadr_id_pk=boards[0]).count()
+        )
+
+    def test_post_save_board_versions(self):
+        print("Post save board versions Running...")
+
+        # given
+        boards = list(Board.objects.order_by('board_id_pk')[:2])
+        names = [board_version(board.board_id_pk) for board in boards]
+        post = Post.objects.filter(board_boadr_id_pk=boards[0]).first()
+        before = get_versions(names)
+
+        # when
+        post.board_boadr_id_pk = boards[1]
+        with CaptureQueriesContext(connections['jgw_api']) as queries:
+            post.save()
+        after = get_versions(names)
+
+        # then
+        # DB에서 읽을 때 기억한 게시판을 사용하므로 저장 전에 다시 조회하지 않음
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('SELECT')])
+        for name in names:
+            self.assertNotEqual(before[name], after[name])
+
+    def test_post_get_all_invalid_query(self):
+        print("Post Api GET ALL INVALID QUERY Running...")
+
+        # given
+        invalid_parameters = [
+            {'order': 'post_content'},
+            {'order': 'post_title', 'desc': 1},
+            {'desc': 'yes'},
+            {'board': 'notice'},
+            {'start_date': '2023-01-01'},
+            {'start_date': '2023-02-01T00-00-00', 'end_date': '2023-01-01T00-00-00'},
+            {'pagination': 'cursor', 'order': 'post_id_pk'},
+        ]
+
+        for query_parameters in invalid_parameters:
+            # when
+            respons: Response = self.client.get(self.url + 'list/', data=query_parameters, **self.__get_list_header())
+
+            # then
+            self.assertEqual(respons.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(respons.json()['code'], 'JGW_hub-post-006')
+
+    def test_post_filter_spec(self):
+        print("Post filter spec Running...")
+
+        # given
+        board = Board.objects.order_by('board_id_pk').first()
+
+        # when
+        spec = compile_post_filter({'title': '공지', 'board': str(board.board_id_pk)})
+        same_spec = compile_post_filter({'board': board.board_id_pk, 'desc': '0', 'start_date': '', 'title': '공지'})
+        default_sql = str(compile_post_filter({}).apply(Post.objects.all()).query)
+        content_spec = compile_post_filter({'content': 'a', 'order': 'post_id_pk', 'desc': 1})
+
+        # then
+        self.assertEqual(spec, same_spec)
+        self.assertEqual(hash(spec), hash(same_spec))
+        self.assertEqual(spec.ordering, ('post_write_time', 'post_id_pk'))
+        # 값이 없는 기간 조건은 SQL에 넣지 않음
+        self.assertNotIn('BETWEEN', default_sql)
+        self.assertNotIn('WHERE', default_sql)
+        # content가 있어도 정렬은 유지
+        self.assertEqual(content_spec.ordering, ('-post_id_pk',))
+        self.assertEqual(content_spec.apply(Post.objects.all()).query.order_by, ('-post_id_pk',))
+
+    def test_post_get_all_search(self):
+        print("Post Api GET ALL SEARCH Running...")
+
+        # given
+        posts = list(Post.objects.order_by('post_write_time')[:3])
+        posts[0].post_title = '동아리 공지사항 안내'
+        posts[0].save()
+        posts[1].post_title = '공지 사항'
+        posts[1].save()
+        posts[2].post_content = '<p>한글 검색 Test 본문</p>'
+        posts[2].save()
+
+        # when
+        cases = (
+            ({'title': '공지사항'}, {posts[0].post_id_pk}),
+            ({'title': '지 사'}, {posts[1].post_id_pk}),
+            ({'content': '검색 test'}, {posts[2].post_id_pk}),
+            ({'content': '색 T'}, {posts[2].post_id_pk}),
+            ({'title': '없는검색어'}, set()),
+        )
+
+        # then
+        for query_parameters, expected in cases:
+            respons: Response = self.client.get(
+                self.url + 'list/', data={**query_parameters, 'page_size': 100}, **self.__get_list_header()
+            )
+            self.assertEqual(respons.status_code, status.HTTP_200_OK)
+            self.assertEqual({i['post_id_pk'] for i in respons.json()['results']}, expected)
+
+    def test_post_search_mysql_sql(self):
+        print("Post search MySQL SQL Running...")
+
+        # given
+        connection = connections['jgw_api']
+        queryset = Post.objects.using('jgw_api').all()
+
+        # when
+        # MySQL driver 없이 compiler가 as_mysql을 사용하도록 vendor만 바꿔서 SQL을 만든다
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            searched = filter_post_search(queryset, 'post_title', '공지 "사항"')
+            sql, params = searched.query.get_compiler(connection=connection).as_sql()
+            short_sql, _ = filter_post_search(queryset, 'post_title', '공 지').query.get_compiler(connection=connection).as_sql()
+
+        # then
+        self.assertIn('MATCH ("POST"."POST_TITLE") AGAINST (%s IN BOOLEAN MODE) > %s', sql)
+        # 큰따옴표는 지우고 검색어 전체를 구문으로 감싼 뒤, 점수가 0보다 큰 게시글만 찾는다
+        phrase_index = list(params).index('"공지 사항"')
+        self.assertEqual(params[phrase_index + 1], 0)
+        self.assertIn('LIKE', sql)
+        # ngram보다 짧은 단어가 있으면 FULLTEXT 조건 없이 LIKE만 사용
+        self.assertNotIn('MATCH', short_sql)
+
     def test_post_post_no_img(self):
         print("Post no Images Api POST Running...")
 
@@ -392,6 +647,7 @@ class PostApiTestOK(APITestCase):
             'post_content': content_data,
             'post_write_time': now,
             'post_update_time': now,
+            'thumbnail_id_pk': 0,
             'board_boadr_id_pk': board_instance.board_id_pk,
             'member_member_pk': member_instance.member_pk
         }
@@ -411,7 +667,7 @@ class PostApiTestOK(APITestCase):
             'post_content': post_instance.post_content,
             'post_write_time': post_instance.post_write_time.strftime('%Y-%m-%dT%H:%M:%S.%f'),
             'post_update_time': post_instance.post_update_time.strftime('%Y-%m-%dT%H:%M:%S.%f'),
-            "image_image_id_pk": post_instance.image_image_id_pk,
+            'thumbnail_id_pk': post_instance.thumbnail_id_pk,
             'board_boadr_id_pk': {
                 'board_id_pk': board_instance.board_id_pk,
                 'board_name': board_instance.board_name,
@@ -443,8 +699,6 @@ class PostApiTestOK(APITestCase):
         }
         respons: Response = self.client.get(f"{self.url}{key}/", **header_data)
 
-        thumbnail_image = post_instance.image_image_id_pk
-
         # then
         responses_data = {
             'post_id_pk': post_instance.post_id_pk,
@@ -452,12 +706,7 @@ class PostApiTestOK(APITestCase):
             'post_content': post_instance.post_content,
             'post_write_time': post_instance.post_write_time.strftime('%Y-%m-%dT%H:%M:%S.%f'),
             'post_update_time': post_instance.post_update_time.strftime('%Y-%m-%dT%H:%M:%S.%f'),
-            "image_image_id_pk":
-                None if thumbnail_image is None else {
-                'image_id_pk': thumbnail_image.image_id_pk,
-                'image_name': thumbnail_image.image_name,
-                'image_url': thumbnail_image.image_url,
-            },
+            'thumbnail_id_pk': post_instance.thumbnail_id_pk,
             'board_boadr_id_pk': {
                 'board_id_pk': post_instance.board_boadr_id_pk.board_id_pk,
                 'board_name': post_instance.board_boadr_id_pk.board_name,
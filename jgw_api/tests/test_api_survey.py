@@ -18,6 +18,22 @@ from django.utils.crypto import get_random_string
 
 
 from jgw_api.views import post_get_all_query
+from jgw_api.survey_db import (
+    SURVEY_INDEXES,
+    ensure_survey_indexes,
+    find_missing_survey_indexes,
+    get_survey_collections,
+)
+from jgw_api.survey_tally import rebuild_survey_tally
+from jgw_api.survey_analysis import analyze_survey
+from jgw_api.survey_export import iter_answers_csv
+from jgw_api.single_flight import single_flight
+from jgw_api.response_cache import survey_version, bump_versions
+from django.core.cache import cache
+from unittest import mock
+import threading
+import csv
+import io
 
 import os
 import base64
@@ -192,6 +208,7 @@ class SurveyApiTestOK(APITestCase):
                         {"parent_quiz": quizzes[3]['_id'], "selections": list(list(itertools.combinations([0, 1, 2, 3], random.randint(1, 4)))[0])}
                     ]
                 } for _ in range(49)])
+            rebuild_survey_tally(ObjectId(k))
 
     def __get_header(self, member_instance):
         return {
@@ -253,6 +270,27 @@ class SurveyApiTestOK(APITestCase):
         # then
         self.assertEqual(respons.status_code, status.HTTP_200_OK)
 
+    def test_survey_list_title(self):
+        print("Survey Post list TITLE Api GET Running...")
+
+        # given
+        member_instance = Member.objects.get(role_role_pk=Role.objects.get(role_nm='ROLE_DEV'))
+        # 제목 중간에 포함된 경우도 검색됨
+        total_count = len([i for i in self.collection_survey.find() if 'itle1' in i['title']])
+
+        # when
+        respons: Response = self.client.get(self.url, data={'title': 'itle1', 'page_size': 10}, **self.__get_header(member_instance))
+        respons_regex: Response = self.client.get(self.url, data={'title': 'title.', 'page_size': 10}, **self.__get_header(member_instance))
+
+        # then
+        self.assertEqual(respons.status_code, status.HTTP_200_OK)
+        self.assertEqual(respons.json()['total_pages'], total_count // 10 + (1 if total_count % 10 else 0))
+        self.assertEqual(respons.json()['count'], min(total_count, 10))
+        for i in respons.json()['results']:
+            self.assertIn('itle1', i['title'])
+        # 검색어는 정규식으로 해석하지 않음
+        self.assertEqual(respons_regex.json()['count'], 0)
+
     def test_survey_get_by_id(self):
         print("Survey Api GET BY ID Running...")
 
@@ -351,3 +389,352 @@ class SurveyApiTestOK(APITestCase):
 
         # then
         self.assertEqual(respons.status_code, status.HTTP_200_OK)
+
+    def test_survey_indexes(self):
+        print("Survey Indexes Running...")
+
+        # given
+        declared = {(name, index.document['name']) for name, indexes in SURVEY_INDEXES.items() for index in indexes}
+        missing = find_missing_survey_indexes()
+        self.assertTrue(set(missing) <= declared)
+        if type(get_survey_collections().client).__module__.split('.')[0] == 'mongomock':
+            # mongomock은 partialFilterExpression을 무시해서 익명 답변(user: null)끼리 unique index가 충돌함
+            self.skipTest('mongomock ignores partialFilterExpression')
+        ensure_survey_indexes()
+
+        # when
+        missing = find_missing_survey_indexes()
+
+        # then
+        self.assertEqual(missing, [])
+
+    def test_answer_analyze_select_one_count(self):
+        print("Answer Analyze SELECT ONE COUNT Api GET Running...")
+
+        # given
+        member_instance = Member.objects.get(role_role_pk=Role.objects.get(role_nm='ROLE_DEV'))
+        answer = list(self.collection_quiz.find({'parent_post': ObjectId(self.survey_pks[3])}))[2]
+        counts = [0] * len(answer['options'])
+        for i in self.collection_answer.find({'parent_post': ObjectId(self.survey_pks[3])}):
+            for a in i['answers']:
+                if a['parent_quiz'] == answer['_id'] and 'selection' in a:
+                    counts[a['selection']] += 1
+
+        # when
+        respons: Response = self.client.get(self.url + f'{self.survey_pks[3]}/answer/?analyze=1&answer_id={answer["_id"]}', **self.__get_header(member_instance))
+
+        # then
+        self.assertEqual(respons.status_code, status.HTTP_200_OK)
+        self.assertEqual([i['count'] for i in respons.json()], counts)
+
+    def test_answer_post_again(self):
+        print("Answer post again Api POST Running...")
+
+        # given
+        member_instance = Member.objects.get(role_role_pk=Role.objects.get(role_nm='ROLE_DEV'))
+        answer = list(self.collection_quiz.find({'parent_post': ObjectId(self.survey_pks[4])}))[2]
+        url = self.url + f'{self.survey_pks[4]}/answer/?analyze=1&answer_id={answer["_id"]}'
+        before = self.client.get(url, **self.__get_header(member_instance)).json()
+
+        def __answer(selection):
+            return '{"answers": [' \
+                   '{"text": "text", "type": 0},' \
+                   '{"null": 1, "type": 0},' \
+                   f'{{"selection": {selection}, "type": 1}},' \
+                   '{"selections": [0, 3], "type": 2}]}'
+
+        # when
+        respons_first: Response = self.client.post(self.url + f'{self.survey_pks[4]}/answer/', data=__answer(0), content_type='application/json', **self.__get_header(member_instance))
+        respons_again: Response = self.client.post(self.url + f'{self.survey_pks[4]}/answer/', data=__answer(1), content_type='application/json', **self.__get_header(member_instance))
+        after = self.client.get(url, **self.__get_header(member_instance)).json()
+
+        # then
+        self.assertEqual(respons_first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(respons_again.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(after[0]['count'], before[0]['count'])
+        self.assertEqual(after[1]['count'], before[1]['count'] + 1)
+        self.assertEqual(respons_again.json()['_id'], respons_first.json()['_id'])
+        self.assertEqual(self.collection_answer.count_documents({'parent_post': ObjectId(self.survey_pks[4]), 'user': member_instance.member_pk}), 1)
+
+    def test_answer_post_legacy_count(self):
+        print("Answer post legacy survey count Running...")
+
+        # given
+        member_instance = Member.objects.get(role_role_pk=Role.objects.get(role_nm='ROLE_DEV'))
+        collections = get_survey_collections()
+        parent_post = ObjectId(self.survey_pks[10])
+        # answer_count, 문항별 집계가 생기기 전에 답변이 쌓인 설문
+        collections.survey.update_one({'_id': parent_post}, {'$unset': {'answer_count': 1}})
+        collections.tally.delete_many({'parent_post': parent_post})
+        quiz = list(collections.quiz.find({'parent_post': parent_post}).sort('_id', 1))[2]
+        insert_data = '{"answers": [' \
+                      '{"text": "text", "type": 0},' \
+                      '{"null": 1, "type": 0},' \
+                      '{"selection": 0, "type": 1},' \
+                      '{"selections": [0, 3], "type": 2}]}'
+
+        # when
+        respons: Response = self.client.post(self.url + f'{self.survey_pks[10]}/answer/', data=insert_data, content_type='application/json', **self.__get_header(member_instance))
+        respons_list: Response = self.client.get(self.url + f'{self.survey_pks[10]}/answer/?page=1', **self.__get_header(member_instance))
+        respons_analyze: Response = self.client.get(self.url + f'{self.survey_pks[10]}/answer/?analyze=1&answer_id={quiz["_id"]}', **self.__get_header(member_instance))
+
+        # then
+        answers = list(collections.answer.find({'parent_post': parent_post}))
+        counts = [0] * len(quiz['options'])
+        for answer_data in answers:
+            counts[answer_data['answers'][2]['selection']] += 1
+        self.assertEqual(respons.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(collections.survey.find_one({'_id': parent_post})['answer_count'], len(answers))
+        self.assertEqual(respons_list.json()['total_pages'], len(answers) // constant.ANSWER_DEFAULT_PAGE_SIZE + (1 if len(answers) % constant.ANSWER_DEFAULT_PAGE_SIZE else 0))
+        self.assertEqual([i['count'] for i in respons_analyze.json()], counts)
+
+    def test_answer_analyze_all(self):
+        print("Answer Analyze ALL Api GET Running...")
+
+        # given
+        member_instance = Member.objects.get(role_role_pk=Role.objects.get(role_nm='ROLE_DEV'))
+        quizzes = list(self.collection_quiz.find({'parent_post': ObjectId(self.survey_pks[5])}).sort('_id', 1))
+        answers = list(self.collection_answer.find({'parent_post': ObjectId(self.survey_pks[5])}))
+        counts = [0] * len(quizzes[3]['options'])
+        for i in answers:
+            for s in i['answers'][3]['selections']:
+                counts[s] += 1
+
+        # when
+        respons: Response = self.client.get(self.url + f'{self.survey_pks[5]}/answer/?analyze=1&page_size=25', **self.__get_header(member_instance))
+
+        # then
+        self.assertEqual(respons.status_code, status.HTTP_200_OK)
+        results = respons.json()['quizzes']
+        self.assertEqual([i['_id'] for i in results], [str(i['_id']) for i in quizzes])
+        self.assertEqual(len(results[0]['texts']), 25)
+        self.assertEqual(results[0]['total_pages'], len(answers) // 25 + (1 if len(answers) % 25 else 0))
+        self.assertEqual([i['count'] for i in results[3]['options']], counts)
+
+    def test_answer_analyze_all_single_flight(self):
+        print("Answer Analyze ALL single flight Running...")
+
+        # given
+        member_instance = Member.objects.get(role_role_pk=Role.objects.get(role_nm='ROLE_DEV'))
+        url = self.url + f'{self.survey_pks[5]}/answer/?analyze=1&page_size=30'
+        calls = []
+
+        def counted_analyze(*args, **kwargs):
+            calls.append(1)
+            return analyze_survey(*args, **kwargs)
+
+        # when
+        with mock.patch('jgw_api.views.view_survey.analyze_survey', counted_analyze):
+            respons_first: Response = self.client.get(url, **self.__get_header(member_instance))
+            respons_second: Response = self.client.get(url, **self.__get_header(member_instance))
+            calls_before_answer = len(calls)
+            # 답변이 바뀌면 다시 분석
+            bump_versions(survey_version(self.survey_pks[5]))
+            respons_third: Response = self.client.get(url, **self.__get_header(member_instance))
+
+        # then
+        self.assertEqual(respons_first.status_code, status.HTTP_200_OK)
+        self.assertEqual(respons_second.json(), respons_first.json())
+        self.assertEqual(respons_third.json(), respons_first.json())
+        self.assertEqual(calls_before_answer, 1)
+        self.assertEqual(len(calls), 2)
+
+    def test_single_flight(self):
+        print("Single flight Running...")
+
+        # given
+        key = f'test_single_flight:{get_random_string(length=8)}'
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            cache.set(key, 'result', timeout=10)
+            return 'result'
+
+        def lease_holder():
+            # 다른 프로세스가 lease를 잡고 계산하는 상황
+            time.sleep(0.2)
+            cache.set(key + ':other', 'other result', timeout=10)
+            cache.delete(f'{constant.SINGLE_FLIGHT_LEASE_PREFIX}:{key}:other')
+
+        # when
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight(key, lambda: cache.get(key), compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        cache.add(f'{constant.SINGLE_FLIGHT_LEASE_PREFIX}:{key}:other', 'other worker', timeout=10)
+        holder = threading.Thread(target=lease_holder)
+        holder.start()
+        other_result = single_flight(key + ':other', lambda: cache.get(key + ':other'), compute)
+        holder.join()
+
+        # then
+        self.assertEqual(results, ['result'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(other_result, 'other result')
+
+    def test_single_flight_timeout(self):
+        print("Single flight timeout Running...")
+
+        # given
+        key = f'test_single_flight_timeout:{get_random_string(length=8)}'
+        lease_key = f'{constant.SINGLE_FLIGHT_LEASE_PREFIX}:{key}'
+        release = threading.Event()
+
+        def hung_compute():
+            # 계산이 끝나지 않는 동안 lease가 만료되어 다른 worker가 가져간 상황
+            release.wait(5)
+            cache.set(lease_key, 'other worker', timeout=10)
+            return 'slow result'
+
+        # when
+        slow_results = []
+        slow = threading.Thread(target=lambda: slow_results.append(single_flight(key, lambda: None, hung_compute)))
+        with mock.patch.object(constant, 'SINGLE_FLIGHT_WAIT_TIMEOUT', 0.3):
+            slow.start()
+            time.sleep(0.1)
+            start = time.monotonic()
+            fast_result = single_flight(key, lambda: None, lambda: 'fast result')
+            elapsed = time.monotonic() - start
+        release.set()
+        slow.join()
+
+        # then
+        # 같은 프로세스의 계산이 멈춰도 timeout 뒤에는 직접 계산
+        self.assertEqual(fast_result, 'fast result')
+        self.assertLess(elapsed, 2)
+        self.assertEqual(slow_results, ['slow result'])
+        # 다른 worker가 가져간 lease는 지우지 않음
+        self.assertEqual(cache.get(lease_key), 'other worker')
+
+    def test_answer_list_cursor(self):
+        print("Answer Api GET CURSOR Running...")
+
+        # given
+        member_instance = Member.objects.get(role_role_pk=Role.objects.get(role_nm='ROLE_DEV'))
+        answer_ids = [str(i['_id']) for i in self.collection_answer.find({'parent_post': ObjectId(self.survey_pks[6])}).sort('_id', 1)]
+
+        # when
+        results = []
+        pages = []
+        url = self.url + f'{self.survey_pks[6]}/answer/?page_size=25'
+        while url is not None:
+            respons: Response = self.client.get(url, **self.__get_header(member_instance))
+            self.assertEqual(respons.status_code, status.HTTP_200_OK)
+            pages.append(respons.json())
+            results += [i['_id'] for i in respons.json()['results']]
+            url = respons.json()['next']
+        respons_previous: Response = self.client.get(pages[-1]['previous'], **self.__get_header(member_instance))
+
+        # then
+        self.assertEqual(results, answer_ids)
+        self.assertEqual(pages[0]['total_count'], len(answer_ids))
+        self.assertIsNone(pages[0]['previous'])
+        self.assertEqual([i['_id'] for i in respons_previous.json()['results']], answer_ids[:25])
+
+    def test_answer_export(self):
+        print("Answer Export Api GET Running...")
+
+        # given
+        member_instance = Member.objects.get(role_role_pk=Role.objects.get(role_nm='ROLE_DEV'))
+        answer_count = self.collection_answer.count_documents({'parent_post': ObjectId(self.survey_pks[7])})
+
+        # when
+        respons_csv = self.client.get(self.url + f'{self.survey_pks[7]}/answer/export/', **self.__get_header(member_instance))
+        respons_ndjson = self.client.get(self.url + f'{self.survey_pks[7]}/answer/export/?file_type=ndjson', **self.__get_header(member_instance))
+
+        # then
+        self.assertEqual(respons_csv.status_code, status.HTTP_200_OK)
+        self.assertEqual(respons_ndjson.status_code, status.HTTP_200_OK)
+        csv_lines = b''.join(respons_csv.streaming_content).decode('utf-8-sig').splitlines()
+        ndjson_lines = b''.join(respons_ndjson.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(csv_lines), answer_count + 1)
+        self.assertEqual(len(ndjson_lines), answer_count)
+
+    def test_answer_export_csv_formula(self):
+        print("Answer Export csv formula escape Running...")
+
+        # given
+        parent_post = ObjectId()
+        quiz_id = ObjectId()
+        quizzes_data = [{'_id': quiz_id, 'title': '=제목', 'type': constant.SURVEY_TEXT_CODE}]
+        texts = ['=HYPERLINK("http://example.com")', '+1', '-1', '@SUM(A1)', '평범한 답변', 12, -3, None]
+        self.collection_answer.insert_many([
+            {'parent_post': parent_post, 'user': None, 'answers': [{'parent_quiz': quiz_id, 'text': text}]}
+            for text in texts
+        ])
+
+        # when
+        lines = ''.join(iter_answers_csv(get_survey_collections(), parent_post, quizzes_data))
+        rows = list(csv.reader(io.StringIO(lines.lstrip('\ufeff'))))
+
+        # then
+        self.assertEqual(rows[0][2], "'=제목")
+        # 문자열이 아닌 답변도 중간에 끊기지 않고 문자열로 내보냄
+        self.assertEqual([row[2] for row in rows[1:]], ["'" + text for text in texts[:4]] + ['평범한 답변', '12', "'-3", ''])
+
+    def test_survey_patch_get_by_id(self):
+        print("Survey Api PATCH and GET BY ID Running...")
+
+        # given
+        member_instance = Member.objects.get(role_role_pk=Role.objects.get(role_nm='ROLE_DEV'))
+        self.client.get(self.url + f'{self.survey_pks[8]}/', **self.__get_header(member_instance))
+
+        # when
+        respons_patch: Response = self.client.patch(self.url + f'{self.survey_pks[8]}/', data={'title': '변경된 제목'}, **self.__get_header(member_instance))
+        respons: Response = self.client.get(self.url + f'{self.survey_pks[8]}/', **self.__get_header(member_instance))
+
+        # then
+        self.assertEqual(respons_patch.status_code, status.HTTP_200_OK)
+        self.assertEqual(respons.status_code, status.HTTP_200_OK)
+        self.assertEqual(respons.json()['title'], '변경된 제목')
+        self.assertEqual(len(respons.json()['quizzes']), 4)
+
+    def test_answer_post_bulk(self):
+        print("Answer bulk Api POST Running...")
+
+        # given
+        member_instance = Member.objects.get(role_role_pk=Role.objects.get(role_nm='ROLE_DEV'))
+        quiz = list(self.collection_quiz.find({'parent_post': ObjectId(self.survey_pks[9])}).sort('_id', 1))[2]
+        url = self.url + f'{self.survey_pks[9]}/answer/?analyze=1&answer_id={quiz["_id"]}'
+        before = self.client.get(url, **self.__get_header(member_instance)).json()
+        before_count = self.collection_answer.count_documents({'parent_post': ObjectId(self.survey_pks[9])})
+
+        def __answer(user, selection):
+            return {
+                'user': user,
+                'answers': [
+                    {'text': 'text', 'type': 0},
+                    {'null': 1, 'type': 0},
+                    {'selection': selection, 'type': 1},
+                    {'selections': [0, 3], 'type': 2}
+                ]
+            }
+
+        items = [__answer('bulk_user_1', 0), __answer('bulk_user_2', 0), __answer(None, 0),
+                 __answer('bulk_user_1', 0), __answer('bulk_user_3', 100), __answer(123, 0)]
+
+        # when
+        respons: Response = self.client.post(self.url + f'{self.survey_pks[9]}/answer/bulk/', data={'items': items}, format='json', **self.__get_header(member_instance))
+        respons_again: Response = self.client.post(self.url + f'{self.survey_pks[9]}/answer/bulk/', data={'items': [__answer('bulk_user_2', 1)]}, format='json', **self.__get_header(member_instance))
+        respons_invalid: Response = self.client.post(self.url + f'{self.survey_pks[9]}/answer/bulk/', data={'items': [__answer(['bulk_user_4'], 0), __answer('bulk_user_4', 100)]}, format='json', **self.__get_header(member_instance))
+        after = self.client.get(url, **self.__get_header(member_instance)).json()
+
+        # then
+        self.assertEqual(respons.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(respons.json()['created'], 3)
+        self.assertEqual([e['index'] for e in respons.json()['errors']], [3, 4, 5])
+        self.assertEqual(respons_again.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(respons_again.json()['updated'], 1)
+        self.assertEqual(respons_invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([e['index'] for e in respons_invalid.json()['errors']], [0, 1])
+        self.assertEqual(self.collection_answer.count_documents({'parent_post': ObjectId(self.survey_pks[9])}), before_count + 3)
+        self.assertEqual(after[0]['count'], before[0]['count'] + 2)
+        self.assertEqual(after[1]['count'], before[1]['count'] + 1)
@@ -0,0 +1,78 @@
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.test import RequestFactory
+from jgw_api.models import (
+    Board,
+    Role,
+    Config
+)
+from jgw_api.views.view_check import request_check_admin_upload_role
+from jgw_api.middleware import AuthContext
+
+
+class AuthContextTestOK(APITestCase):
+    databases = '__all__'
+    def setUp(self):
+        self.url = '/hub/api/v1/board/'
+        # 다른 테스트에서 올린 registry version이 남지 않도록 비움
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        Role.objects.create(role_pk=0, role_nm='ROLE_GUEST')
+        Role.objects.create(role_pk=100, role_nm='ROLE_USER0')
+        Role.objects.create(role_pk=101, role_nm='ROLE_USER1')
+        Role.objects.create(role_pk=500, role_nm='ROLE_ADMIN')
+        Role.objects.create(role_pk=501, role_nm='ROLE_DEV')
+
+        Config.objects.create(config_nm='admin_role_pk', config_val='500', config_pk=500)
+
+    def __make_header(self):
+        header_data = {
+            'HTTP_USER_PK': 'pkpkpkpkpkpkpkpkpkpkpk',
+            'HTTP_ROLE_PK': 500
+        }
+        return header_data
+
+    def test_auth_context(self):
+        print("Auth context Running...")
+
+        # given
+        board = Board.objects.create(
+            board_name='권한 게시판',
+            board_layout=0,
+            role_role_pk_write_level=Role.objects.get(role_pk=101),
+            role_role_pk_read_level=Role.objects.get(role_pk=101),
+            role_role_pk_comment_write_level=Role.objects.get(role_pk=101)
+        )
+
+        # when
+        admin = AuthContext.from_meta(self.__make_header())
+        user = AuthContext.from_meta({'HTTP_USER_PK': 'user', 'HTTP_ROLE_PK': '100'})
+        anonymous = AuthContext.from_meta({})
+
+        # then
+        self.assertTrue(admin.is_admin)
+        self.assertFalse(user.is_admin)
+        self.assertFalse(anonymous.authenticated)
+        self.assertEqual(anonymous.effective_role, -1)
+        self.assertIn(board.board_id_pk, admin.readable_board_ids)
+        self.assertNotIn(board.board_id_pk, user.readable_board_ids)
+        with self.assertNumQueries(0, using='jgw_api'):
+            user.readable_board_ids
+
+    def test_request_check_admin_upload_role(self):
+        print("Request check admin upload role Running...")
+
+        # given
+        Config.objects.create(config_nm='min_upload_role_pk', config_val='100')
+        request = RequestFactory().get(self.url, **self.__make_header())
+        request_check_admin_upload_role(request)
+
+        # when
+        with self.assertNumQueries(0, using='jgw_api'):
+            checked = request_check_admin_upload_role(request)
+
+        # then
+        self.assertEqual(checked[3], 100)
+        self.assertEqual(request.auth_context.min_upload_role, 100)
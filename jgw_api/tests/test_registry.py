@@ -0,0 +1,126 @@
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.test import override_settings
+from jgw_api.models import (
+    Board,
+    Role,
+    Config,
+    GatewayManagementConfig
+)
+from jgw_api.views.view_check import get_admin_role_pk, get_min_upload_role_pk
+from jgw_api.registry import get_board_permission, get_configs
+from jgw_api.checks import check_shared_cache
+
+
+class RegistryTestOK(APITestCase):
+    databases = '__all__'
+    def setUp(self):
+        # 다른 테스트에서 올린 registry version이 남지 않도록 비움
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        Role.objects.create(role_pk=0, role_nm='ROLE_GUEST')
+        Role.objects.create(role_pk=100, role_nm='ROLE_USER0')
+        Role.objects.create(role_pk=101, role_nm='ROLE_USER1')
+        Role.objects.create(role_pk=500, role_nm='ROLE_ADMIN')
+        Role.objects.create(role_pk=501, role_nm='ROLE_DEV')
+
+        Config.objects.create(config_nm='admin_role_pk', config_val='500', config_pk=500)
+
+    def test_admin_role_registry(self):
+        print("Admin role registry Running...")
+
+        # given
+        get_admin_role_pk()
+
+        # when
+        with self.assertNumQueries(0, using='jgw_api'):
+            cached = get_admin_role_pk()
+        Role.objects.filter(role_pk=500).delete()
+        Role.objects.create(role_pk=499, role_nm='ROLE_ADMIN')
+        changed = get_admin_role_pk()
+
+        # then
+        self.assertEqual(cached, 500)
+        self.assertEqual(changed, 499)
+
+    def test_config_registry(self):
+        print("Config registry Running...")
+
+        # given
+        config = Config.objects.create(config_nm='min_upload_role_pk', config_val='100')
+        get_min_upload_role_pk()
+
+        # when
+        with self.assertNumQueries(0, using='jgw_api'):
+            cached = get_min_upload_role_pk()
+        config.config_val = '101'
+        config.save()
+        changed = get_min_upload_role_pk()
+
+        # then
+        self.assertEqual(cached, 100)
+        self.assertEqual(changed, 101)
+
+    def test_gateway_config_registry(self):
+        print("Gateway config registry Running...")
+
+        # given
+        gateway = GatewayManagementConfig.objects.create(
+            gateway_management_config_nm='api_route_refresh', gateway_management_config_val='1'
+        )
+        get_configs()
+
+        # when
+        with self.assertNumQueries(0, using='jgw_api'):
+            cached = get_configs().get_gateway_int('api_route_refresh')
+        gateway.gateway_management_config_val = '0'
+        gateway.save()
+        changed = get_configs().get_gateway_int('api_route_refresh')
+
+        # then
+        self.assertEqual(cached, 1)
+        self.assertEqual(changed, 0)
+        self.assertEqual(get_configs().get_gateway_str('missing', 'default'), 'default')
+
+    def test_board_permission_matrix(self):
+        print("Board permission matrix Running...")
+
+        # given
+        board = Board.objects.create(
+            board_name='권한 matrix',
+            board_layout=0,
+            role_role_pk_write_level=Role.objects.get(role_pk=100),
+            role_role_pk_read_level=Role.objects.get(role_pk=0),
+            role_role_pk_comment_write_level=Role.objects.get(role_pk=101)
+        )
+        get_board_permission(board.board_id_pk)
+
+        # when
+        with self.assertNumQueries(0, using='jgw_api'):
+            cached = get_board_permission(board.board_id_pk)
+        board.role_role_pk_read_level = Role.objects.get(role_pk=500)
+        board.save()
+        changed = get_board_permission(board.board_id_pk)
+
+        # then
+        self.assertEqual((cached.read, cached.write, cached.comment_write), (0, 100, 101))
+        self.assertEqual(changed.read, 500)
+
+    def test_check_shared_cache(self):
+        print("Shared cache check Running...")
+
+        # given
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': 'redis://localhost:6379'}}
+
+        # when
+        with override_settings(DEBUG=False, CACHES=locmem):
+            local_warnings = check_shared_cache(None)
+        with override_settings(DEBUG=False, CACHES=redis):
+            shared_warnings = check_shared_cache(None)
+
+        # then
+        self.assertEqual([w.id for w in local_warnings], ['jgw_api.W003'])
+        self.assertEqual(shared_warnings, [])
@@ -58,10 +58,20 @@ survey_post_answer = SurveyViewSet.as_view({
     'get': 'list_answers',
 })
 
+survey_answer_bulk = SurveyViewSet.as_view({
+    'post': 'create_answers_bulk',
+})
+
+survey_answer_export = SurveyViewSet.as_view({
+    'get': 'export_answers',
+})
+
 urlpatterns += format_suffix_patterns([
     path('v1/survey/', survey_post_post, name='survey-post-post'),
     path('v1/survey/<str:pk>/', survey_post_get, name='survey-post-get'),
     path('v1/survey/<str:pk>/answer/', survey_post_answer, name='survey-answer-post'),
+    path('v1/survey/<str:pk>/answer/bulk/', survey_answer_bulk, name='survey-answer-bulk'),
+    path('v1/survey/<str:pk>/answer/export/', survey_answer_export, name='survey-answer-export'),
 ])
 
 if settings.DEBUG:
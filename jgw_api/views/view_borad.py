@@ -18,6 +18,7 @@ from .view_check import (
     get_logger,
     request_check_admin_role
 )
+from ..response_cache import BOARD_LIST_VERSION, make_response_cache_key, cached_response
 
 
 logger = get_logger()
@@ -35,18 +36,13 @@ class BoardViewSet(viewsets.ModelViewSet):
     # get
     def list(self, request, *args, **kwargs):
         logger.debug(f"Board get request")
+        # 게시판 목록은 요청한 유저의 권한과 관계없이 같으므로 role은 key에 넣지 않음
+        key = make_response_cache_key(request, 'board_list', [BOARD_LIST_VERSION])
+        return cached_response(key, lambda: self._list(request))
+
+    def _list(self, request):
         queryset = self.filter_queryset(self.get_queryset())
-        request.query_params._mutable = True
-        if 'page' not in request.query_params:
-            # page를 지정하지 않으면 1로 지정
-            request.query_params['page'] = 1
-        if 'page_size' in request.query_params:
-            # page size를 최소~최대 범위 안에서 지정
-            request.query_params['page_size'] = int(request.query_params['page_size'])
-            if request.query_params['page_size'] < constant.BOARD_MIN_PAGE_SIZE:
-                request.query_params['page_size'] = constant.BOARD_MIN_PAGE_SIZE
-            elif request.query_params['page_size'] > constant.BOARD_MAX_PAGE_SIZE:
-                request.query_params['page_size'] = constant.BOARD_MAX_PAGE_SIZE
+        # page size 범위 제한과 링크 생성은 paginator에서 처리
         page = self.paginate_queryset(queryset)
         serializer = self.get_serializer(page, many=True)
         responses = self.get_paginated_response(serializer.data)
@@ -7,6 +7,8 @@ from ..models import (
     Config,
     Role
 )
+from ..registry import get_role_pk, get_configs
+from ..middleware import get_auth_context
 
 import logging
 
@@ -27,11 +29,10 @@ def get_user_header(
     :return: user header가 정상적으로 존재한다면 user의 uid, role이 리턴.
         user header가 없다면 500 response 리턴
     '''
-    # 헤더에서 유저 정보 가져오기
-    user_uid = request.META.get('HTTP_USER_PK', None)
-    user_role_id = request.META.get('HTTP_ROLE_PK', None)
+    # middleware에서 해석해둔 유저 정보 가져오기
+    context = get_auth_context(request)
 
-    if user_uid is None or user_role_id is None:
+    if not context.authenticated:
         # 유저 정보가 정상적으로 없다면 500 response 리턴
         logger.error('get user information failed.')
         responses_data = {
@@ -50,9 +51,7 @@ def get_user_header(
         return Response(responses_data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     else:
         # 유저 정보가 있다면 유저 정보 리턴
-        user_role_id = int(user_role_id)
-        logger.info(f'get user information success\tuser uid: {user_uid}\tuser role: {user_role_id}')
-        return user_uid, user_role_id
+        return context.uid, context.role
 
 def get_admin_role_pk() -> Union[rest_framework.response.Response, int]:
     '''
@@ -63,7 +62,8 @@ def get_admin_role_pk() -> Union[rest_framework.response.Response, int]:
     '''
     try:
         # 어드민 롤을 정상적으로 가져오면 최소 어드민 롤 리턴
-        config_admin_role = Role.objects.get(role_nm="ROLE_ADMIN").role_pk #Config.objects.get(config_nm='admin_role_pk').config_val
+        # role은 거의 바뀌지 않으므로 요청마다 조회하지 않고 role registry에서 가져옴
+        config_admin_role = get_role_pk("ROLE_ADMIN") #Config.objects.get(config_nm='admin_role_pk').config_val
         # logger.debug(f'get admin role success\tmin admin role: {config_admin_role}')
         return int(config_admin_role)
     except:
@@ -91,10 +91,11 @@ def get_min_upload_role_pk() -> Union[rest_framework.response.Response, int]:
     :return: 콘텐츠를 업로드 할 수 있는 최소 role 번호.
         최소 admin role의 정보가 없다면 500 response 리턴.
     '''
-    config_admin_role = Config.objects.filter(config_nm='min_upload_role_pk')
-    if config_admin_role:
+    # 요청마다 조회하지 않고 config registry에서 가져옴
+    config_admin_role = get_configs().get_int('min_upload_role_pk')
+    if config_admin_role is not None:
         # 최소 업로드 롤을 정상적으로 가져오면 최소 업로드 롤 리턴
-        return int(config_admin_role[0].config_val)
+        return config_admin_role
     else:
         # 최소 업로드 롤 정보가 없다면 500 response 리턴
         responses_data = {
@@ -113,6 +114,38 @@ def get_min_upload_role_pk() -> Union[rest_framework.response.Response, int]:
         logger.error('min upload role not found')
         return Response(responses_data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def get_request_admin_role_pk(
+        request: rest_framework.request.Request
+    ) -> Union[rest_framework.response.Response, int]:
+    '''
+    요청의 AuthContext에서 admin의 최소 role을 가져오는 함수. 같은 요청에서는 한번만 계산한다.
+
+    :param request: 게이트웨이로 부터 전달받은 request
+    :return: admin의 최소 role 번호.
+        최소 admin role의 정보가 없다면 500 response 리턴.
+    '''
+    admin_role = get_auth_context(request).admin_role
+    if admin_role is None:
+        # 최소 어드민 롤 정보가 없다면 get_admin_role_pk 에서 500 response를 만든다
+        return get_admin_role_pk()
+    return admin_role
+
+def get_request_min_upload_role_pk(
+        request: rest_framework.request.Request
+    ) -> Union[rest_framework.response.Response, int]:
+    '''
+    요청의 AuthContext에서 콘텐츠를 업로드 할 수 있는 최소 role을 가져오는 함수. 같은 요청에서는 한번만 계산한다.
+
+    :param request: 게이트웨이로 부터 전달받은 request
+    :return: 콘텐츠를 업로드 할 수 있는 최소 role 번호.
+        최소 업로드 role의 정보가 없다면 500 response 리턴.
+    '''
+    min_upload_role = get_auth_context(request).min_upload_role
+    if min_upload_role is None:
+        # 최소 업로드 롤 정보가 없다면 get_min_upload_role_pk 에서 500 response를 만든다
+        return get_min_upload_role_pk()
+    return min_upload_role
+
 def request_check(
         request: rest_framework.request.Request
     ) -> Union[rest_framework.response.Response, Tuple[str, int]]:
@@ -144,9 +177,9 @@ def request_check_admin_role(
     if isinstance(header_checked, Response):
         # get_user_header 에서 response 타입이 리턴됐다면 오류
         return header_checked
-    admin_role_checked = get_admin_role_pk()
+    admin_role_checked = get_request_admin_role_pk(request)
     if isinstance(admin_role_checked, Response):
-        # get_admin_role_pk 에서 response 타입이 리턴됐다면 오류
+        # get_request_admin_role_pk 에서 response 타입이 리턴됐다면 오류
         return admin_role_checked
     user_uid, user_role_id = header_checked
     return user_uid, user_role_id, admin_role_checked
@@ -165,13 +198,13 @@ def request_check_admin_upload_role(
     if isinstance(header_checked, Response):
         # get_user_header 에서 response 타입이 리턴됐다면 오류
         return header_checked
-    admin_role_checked = get_admin_role_pk()
+    admin_role_checked = get_request_admin_role_pk(request)
     if isinstance(admin_role_checked, Response):
-        # get_admin_role_pk 에서 response 타입이 리턴됐다면 오류
+        # get_request_admin_role_pk 에서 response 타입이 리턴됐다면 오류
         return admin_role_checked
-    min_upload_role_checked = get_min_upload_role_pk()
+    min_upload_role_checked = get_request_min_upload_role_pk(request)
     if isinstance(min_upload_role_checked, Response):
-        # get_min_upload_role_pk 에서 response 타입이 리턴됐다면 오류
+        # get_request_min_upload_role_pk 에서 response 타입이 리턴됐다면 오류
         return min_upload_role_checked
     user_uid, user_role_id = header_checked
     return user_uid, user_role_id, admin_role_checked, min_upload_role_checked
@@ -20,6 +20,7 @@ from .view_check import (
     get_logger,
     request_check_admin_role,
 )
+from ..middleware import get_auth_context
 import datetime
 
 logger = get_logger()
@@ -37,7 +38,6 @@ class CommentViewSet(viewsets.ModelViewSet):
     # get
     def list(self, request, *args, **kwargs):
         logger.debug(f"Comment get request")
-        request.query_params._mutable = True
         if 'post_id' not in request.query_params:
             # query parameter에 post_id가 없으면 400 return
             data = {
@@ -61,16 +61,7 @@ class CommentViewSet(viewsets.ModelViewSet):
                 comment_comment_id_ref=None
             )
 
-        if 'page' not in request.query_params:
-            # page를 지정하지 않으면 1로 지정
-            request.query_params['page'] = 1
-        if 'page_size' in request.query_params:
-            # page size를 최소~최대 범위 안에서 지정
-            request.query_params['page_size'] = int(request.query_params['page_size'])
-            if request.query_params['page_size'] < constant.COMMENT_MIN_PAGE_SIZE:
-                request.query_params['page_size'] = constant.COMMENT_MIN_PAGE_SIZE
-            elif request.query_params['page_size'] > constant.COMMENT_MAX_PAGE_SIZE:
-                request.query_params['page_size'] = constant.COMMENT_MAX_PAGE_SIZE
+        # page size 범위 제한과 링크 생성은 paginator에서 처리
         page = self.paginate_queryset(queryset)
         serializer = self.get_serializer(page, many=True)
         return self.get_paginated_response(serializer.data)
@@ -162,8 +153,8 @@ class CommentViewSet(viewsets.ModelViewSet):
 
 
         post_instance = comment_serializer.validated_data['post_post_id_pk']
-        board_instance = post_instance.board_boadr_id_pk
-        if user_role_id >= admin_role_pk or user_role_id >= board_instance.role_role_pk_comment_write_level.role_pk:
+        # 게시판 권한은 FK를 따라가지 않고 권한 matrix에서 가져옴
+        if get_auth_context(request).can_comment_board(post_instance.board_boadr_id_pk_id):
             # 요청한 유저가 admin or 요청한 게시판 댓글 쓰기 레벨 이상이면 승인
             logger.debug(f'{user_uid} Comment post approved')
             self.perform_create(comment_serializer)
@@ -208,9 +199,9 @@ class CommentViewSet(viewsets.ModelViewSet):
             return checked
         user_uid, user_role_id, admin_role_pk = checked
 
-        board_instance = instance.post_post_id_pk.board_boadr_id_pk
+        context = get_auth_context(request)
         user_instance = instance.member_member_pk
-        if user_role_id >= board_instance.role_role_pk_comment_write_level.role_pk \
+        if context.can_comment_board(instance.post_post_id_pk.board_boadr_id_pk_id) \
                 and user_uid == user_instance.member_pk:
             # 요청한 유저의 role이 해당 게시판 댓글 쓰기 레벨 이상이고, 댓글을 작성했던 본인이면 승인
             logger.debug(f'{user_uid} Comment patch approved')
@@ -13,20 +13,23 @@ from ..models import (
 from ..serializers import (
     PostWriteSerializer,
     PostGetSerializer,
+    PostListSerializer,
     PostPatchSerializer,
 )
 from ..custom_pagination import (
     PostPageNumberPagination,
+    PostCursorPagination,
 )
 
-import jgw_api.constant as constant
-
 from .view_check import (
     get_logger,
     request_check_admin_role,
-    get_admin_role_pk,
-    request_check,
+    get_request_admin_role_pk,
 )
+from ..middleware import get_auth_context
+from ..registry import get_board_permission, get_board_permissions
+from ..response_cache import MEMBER_VERSION, board_version, make_response_cache_key, cached_response
+from ..post_filter import PostFilterError, compile_post_filter
 import datetime
 
 logger = get_logger()
@@ -43,45 +46,10 @@ def post_get_all_query(
     :param query_params: 필터에 적용시킬 쿼리 파라미터
     :param queryset: 쿼리 파라미터를 적용시킬 post instance
     :return: 쿼리 파라미터에 맞게 추출된 django orm instance 리턴
+    :raise PostFilterError: 쿼리 파라미터가 잘못된 경우
     '''
-    start_date = datetime.datetime.min
-    end_date = datetime.datetime.max
-
-    if 'start_date' in query_params:
-        start_date = datetime.datetime.strptime(query_params['start_date'], constant.TIME_QUERY)
-    if 'end_date' in query_params:
-        end_date = datetime.datetime.strptime(query_params['end_date'], constant.TIME_QUERY)
-    queryset = queryset.filter(post_write_time__range=(start_date, end_date))
-
-    if 'writer_uid' in query_params:
-        queryset = queryset.filter(member_member_pk=query_params['writer_uid'])
-
-    if 'writer_name' in query_params:
-        queryset = queryset.filter(member_member_pk__member_nm__contains=query_params['writer_name'])
-
-    if 'board' in query_params:
-        # if is_admin:
-        #     queryset = queryset.filter(board_boadr_id_pk=query_params['board'])
-        # else:
-        #     queryset = queryset.filter(
-        #         board_boadr_id_pk=query_params['board'],
-        #         board_boadr_id_pk__role_role_pk_read_level__role_pk__gte=user_role_id
-        #     )
-        queryset = queryset.filter(board_boadr_id_pk=query_params['board'])
-
-    if 'title' in query_params:
-        queryset = queryset.filter(post_title__icontains=query_params['title'])
-
-    if 'order' in query_params:
-        if 'desc' in query_params and int(query_params['desc']):
-            queryset = queryset.order_by('-' + query_params['order'])
-        else:
-            queryset = queryset.order_by(query_params['order'])
-    if 'content' in query_params:
-        queryset = queryset.filter(post_content__icontains=query_params['content'])
-    else:
-        queryset = queryset.order_by('post_write_time')
-    return queryset
+    # 읽기 권한 필터는 호출하는 쪽에서 읽을 수 있는 게시판 id 목록으로 건다 (PostViewSet.list)
+    return compile_post_filter(query_params).apply(queryset)
 
 
 class PostViewSet(viewsets.ModelViewSet):
@@ -89,52 +57,82 @@ class PostViewSet(viewsets.ModelViewSet):
     게시글 api를 담당하는 클래스
     '''
     serializer_class = PostGetSerializer
-    queryset = Post.objects.all()
+    # PostGetSerializer가 게시판, 작성자를 nested로 보여주므로 처음 조회할 때 join 해서 가져옴
+    queryset = Post.objects.select_related('board_boadr_id_pk', 'member_member_pk')
     pagination_class = PostPageNumberPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
 
     # get
     def list(self, request, *args, **kwargs):
         logger.debug(f"Post get request")
-        queryset = Post.objects.all()
-        queryset = post_get_all_query(request.query_params, queryset)
-
-        request.query_params._mutable = True
-        if 'page' not in request.query_params:
-            # page를 지정하지 않으면 1로 지정
-            request.query_params['page'] = 1
-        if 'page_size' in request.query_params:
-            # page size를 최소~최대 범위 안에서 지정
-            request.query_params['page_size'] = int(request.query_params['page_size'])
-            if request.query_params['page_size'] < constant.POST_MIN_PAGE_SIZE:
-                request.query_params['page_size'] = constant.POST_MIN_PAGE_SIZE
-            elif request.query_params['page_size'] > constant.POST_MAX_PAGE_SIZE:
-                request.query_params['page_size'] = constant.POST_MAX_PAGE_SIZE
+        context = get_auth_context(request)
+        try:
+            spec = compile_post_filter(request.query_params)
+            if PostCursorPagination.is_requested(request) and spec.order != PostCursorPagination.ordering_field:
+                # cursor는 (작성 시간, id) keyset이므로 다른 정렬을 요청하면 순서가 맞지 않음
+                raise PostFilterError('order', f'must be {PostCursorPagination.ordering_field} in cursor pagination')
+        except PostFilterError as e:
+            logger.info(f"Post get request denied - invalid query parameter\t{e}")
+            detail = {
+                "timestamp": datetime.datetime.now().isoformat(),
+
+                "status": 400,
+
+                "error": "Bad Request",
+
+                "code": "JGW_hub-post-006",
+
+                "message": f"invalid query parameter {e.param}: {e.message}",
+
+                "path": "/hub/api/v1/post/"
+            }
+            return Response(detail, status=status.HTTP_400_BAD_REQUEST)
+
+        board_ids = get_board_permissions().keys() if context.is_admin else context.readable_board_ids
+        if spec.board is not None:
+            # 게시판 하나만 조회하면 그 게시판의 version만 확인
+            board_ids = set(board_ids) & {spec.board}
+        # 읽을 수 있는 게시판이 role마다 다르므로 role도 key에 포함
+        key = make_response_cache_key(
+            request, 'post_list',
+            [MEMBER_VERSION, *(board_version(board_id) for board_id in board_ids)],
+            scope=f'{context.effective_role}:{int(context.is_admin)}'
+        )
+        return cached_response(key, lambda: self._list(request, context, spec))
+
+    def _list(self, request, context, spec):
+        # 목록은 저장해둔 요약만 보여주므로 본문(TEXT)은 읽지 않음
+        queryset = self.get_queryset().defer('post_content')
+        if not context.is_admin:
+            # 읽을 수 있는 게시판은 권한 matrix로 한번만 계산하고, 게시판 id IN (...) 조건으로 넘김
+            queryset = queryset.filter(board_boadr_id_pk__in=context.readable_board_ids)
+        queryset = spec.apply(queryset)
+
+        if PostCursorPagination.is_requested(request):
+            # cursor 모드는 OFFSET, COUNT(*) 없이 (작성 시간, id) keyset으로 페이지를 찾는다
+            paginator = PostCursorPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            serializer = PostListSerializer(page, many=True, context=self.get_serializer_context())
+            return paginator.get_paginated_response(serializer.data)
+        # page size 범위 제한과 링크 생성은 paginator에서 처리
         page = self.paginate_queryset(queryset)
-        serializer = self.get_serializer(page, many=True)
-        data = serializer.data
-        for i in data:
-            if len(i['post_content']) > 500:
-                i['post_content'] = i['post_content'][:500]
-        return self.get_paginated_response(data)
+        serializer = PostListSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
 
     # get by id
     def retrieve(self, request, *args, **kwargs):
-        checked = request_check(request)
-        if isinstance(checked, Response):
-            # user role이 없다면 최하위 권한 적용
-            user_role_id = -1
-            user_uid = None
-        else:
-            user_uid, user_role_id = checked
-        admin_role_checked = get_admin_role_pk()
+        # user role이 없다면 최하위 권한 적용
+        context = get_auth_context(request)
+        user_uid = context.uid
+        admin_role_checked = get_request_admin_role_pk(request)
         if isinstance(admin_role_checked, Response):
             # admin role이 없다면 500 return
             return admin_role_checked
 
         instance = self.get_object()
 
-        if user_role_id >= admin_role_checked or user_role_id >= instance.board_boadr_id_pk.role_role_pk_read_level.role_pk:
+        # 게시판 권한은 FK를 따라가지 않고 권한 matrix에서 가져옴
+        if context.can_read_board(instance.board_boadr_id_pk_id):
             # 요청한 유저가 admin or 해당 게시판 게시글 읽기 레벨 이상이면 승인
             logger.debug(f'{user_uid} Post get retrieve approved')
             post_serializer = self.get_serializer(instance)
@@ -168,8 +166,10 @@ class PostViewSet(viewsets.ModelViewSet):
             # user role, 최소 admin role이 없다면 500 return
             return checked
         user_uid, user_role_id, admin_role_pk = checked
+        context = get_auth_context(request)
 
-        if user_uid == instance.member_member_pk.member_pk and user_role_id >= instance.board_boadr_id_pk.role_role_pk_write_level.role_pk:
+        if user_uid == instance.member_member_pk.member_pk \
+                and context.can_write_board(instance.board_boadr_id_pk_id):
             # 요청한 유저가 글을 작성했던 본인이고, 해당 게시판 게시글 쓰기 레벨 이상이면 승인
             logger.debug(f'{user_uid} Post patch approved')
             request_data = request.data
@@ -182,8 +182,10 @@ class PostViewSet(viewsets.ModelViewSet):
                 request_data._mutable = True
             if 'board_boadr_id_pk' in request_data:
                 # 변경하려는 데이터가 해당 게시글이 소속된 게시판이라면
-                board_instance = Board.objects.get(board_id_pk=int(request_data['board_boadr_id_pk']))
-                if board_instance.role_role_pk_write_level.role_pk > user_role_id:
+                target_board_id = int(request_data['board_boadr_id_pk'])
+                if get_board_permission(target_board_id) is None:
+                    raise Board.DoesNotExist
+                if not context.can_write_board(target_board_id):
                     # 변경하려는 게시판의 쓰기 레벨보다 요청한 유저의 권한이 낮다면 거부
                     logger.info(f"{user_uid} Post patch denied - request board not allowed")
                     responses_data = {
@@ -212,7 +214,7 @@ class PostViewSet(viewsets.ModelViewSet):
 
             if getattr(instance, '_prefetched_objects_cache', None):
                 instance._prefetched_objects_cache = {}
-            instance = Post.objects.get(post_id_pk=instance.post_id_pk)
+            instance = self.get_queryset().get(post_id_pk=instance.post_id_pk)
 
             responses_serializer = self.get_serializer(instance)
             responses_data = responses_serializer.data
@@ -275,13 +277,13 @@ class PostViewSet(viewsets.ModelViewSet):
         logger.debug(f'{user_uid} Post data verified')
 
         board_instance = post_serializer.validated_data['board_boadr_id_pk']
-        if user_role_id >= admin_role_pk or user_role_id >= board_instance.role_role_pk_write_level.role_pk:
+        if get_auth_context(request).can_write_board(board_instance.board_id_pk):
             # 요청한 유저가 admin or 요청한 게시판 게시글 쓰기 레벨 이상이면 승인
             logger.debug(f'{user_uid} Post post approved')
             self.perform_create(post_serializer)
 
             post_pk = post_serializer.data['post_id_pk']
-            responses_instance = Post.objects.get(post_id_pk=post_pk)
+            responses_instance = self.get_queryset().get(post_id_pk=post_pk)
             serializer = self.get_serializer(responses_instance)
 
             responses_data = serializer.data
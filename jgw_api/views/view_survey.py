@@ -1,49 +1,49 @@
+import re
 import datetime
 
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 
-from django.conf import settings
-from django.http import Http404
+from django.core.cache import cache
+from django.http import Http404, StreamingHttpResponse
 
 import jgw_api.constant as constant
 
 from secrets_content.files.secret_key import *
 
-import pymongo
 from bson.objectid import ObjectId
+from pymongo import InsertOne, ReplaceOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+from ..survey_db import get_survey_collections
+from ..survey_tally import apply_answer_tally, apply_answers_tally, read_option_tally, get_answer_count
+from ..survey_analysis import analyze_survey
+from ..survey_export import iter_answers_csv, iter_answers_ndjson
+from ..survey_definition import (
+    get_survey_definition,
+    invalidate_survey_definition,
+    build_answers,
+)
 from .view_check import (
     get_logger,
     request_check_admin_role,
-    request_check
 )
+from ..middleware import get_auth_context
+from ..single_flight import single_flight
+from ..response_cache import survey_version, get_versions, bump_versions
 
 logger = get_logger()
 
 class SurveyViewSet(viewsets.ViewSet):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        def __create_collection(db, name, validator):
-            try:
-                collection = db.create_collection(name)
-                # db.command({
-                #     'collMod': name,
-                #     'validator': validator,
-                #     'validationAction': 'error'
-                # })
-            except:
-                collection = db.get_collection(name)
-            return collection
-
-        self.client = pymongo.MongoClient(SURVEY_DATABASES)
-
-        if not settings.TESTING:
-            self.db = self.client.get_database(constant.SURVEY_DB_NAME)
-        else:
-            self.db = self.client.get_database(os.environ.get("TEST_DB_NAME", 'test'))
-        self.collection_survey = __create_collection(self.db, constant.SURVEY_POST_DB_NME, None)
-        self.collection_quiz = __create_collection(self.db, constant.SURVEY_QUIZ, None)
-        self.collection_answer = __create_collection(self.db, constant.SURVEY_ANSWER, None)
+        # DRF는 요청마다 viewset을 새로 만들기 때문에 프로세스 단위로 공유되는 handle을 사용
+        collections = get_survey_collections()
+        self.collections = collections
+        self.client = collections.client
+        self.db = collections.db
+        self.collection_survey = collections.survey
+        self.collection_quiz = collections.quiz
+        self.collection_answer = collections.answer
 
     def create_post(self, request):
         checked = request_check_admin_role(request)
@@ -68,6 +68,7 @@ class SurveyViewSet(viewsets.ViewSet):
                     'activate': int(post_data['activate']),
                     'created_time': created_time,
                     'modified_time': created_time,
+                    'answer_count': 0,
                 }
                 # if to is not None:
                 #     assert created_time < to, 'The last day must be later than the start date.'
@@ -163,69 +164,44 @@ class SurveyViewSet(viewsets.ViewSet):
             return Response(detail, status=status.HTTP_403_FORBIDDEN)
 
     def create_answer(self, request, pk):
-        checked = request_check(request)
-        if isinstance(checked, Response):
-            # user role이 없다면 최하위 권한 적용
-            user_role_id = -1
-            user_uid = None
-        else:
-            user_uid, user_role_id = checked
+        # user role이 없다면 최하위 권한 적용
+        context = get_auth_context(request)
+        user_uid, user_role_id = context.uid, context.effective_role
         try:
             request_data = request.data
-            survey_data = self.collection_survey.find_one({'_id': ObjectId(pk)})
-            assert survey_data['role'] <= int(user_role_id), "User is not a survey participant."
+            definition = get_survey_definition(self.collections, pk)
+            assert definition is not None, 'Data does not exist.'
+            assert definition.role <= int(user_role_id), "User is not a survey participant."
             logger.debug(f'{user_uid} Answer post approved')
 
-            quizzes_data = self.collection_quiz.find({'parent_post': ObjectId(pk)})
-            quizzes_data = list(quizzes_data)
-            answers = request_data['answers']
-            assert len(answers) == len(quizzes_data), "The number of responses must equal the number of questions."
-
             answer_data = {
                 '_id': ObjectId(),
-                'parent_post': ObjectId(pk),
+                'parent_post': definition.id,
                 'user': user_uid,
-                'answers': []
+                'answers': build_answers(definition, request_data['answers'])
             }
-            for idx, q in enumerate(quizzes_data):
-                a = answers[idx]
-                type = int(a['type'])
-                assert q['type'] == a['type'], f'The data format of the response is different from the question. idx" {idx}'
-
-                answer = {
-                    "parent_quiz": q['_id']
-                }
-
-                if 'null' in a:
-                    if int(q['require']) == 0 and int(a['null']) == 1:
-                        answer['null'] = 1
-                        answer_data['answers'].append(answer)
-                        continue
-                    elif int(q['require']) == 1 and int(a['null']) == 1:
-                        assert False, 'Required response questions must be answered.'
-
-                # create answer
-                if type == constant.SURVEY_TEXT_CODE:
-                    answer['text'] = a['text']
-                elif type == constant.SURVEY_SELECT_ONE_CODE:
-                    selection = int(a['selection'])
-                    assert selection < len(q['options']), 'An option that does not exist.'
-                    answer['selection'] = selection
-                elif type == constant.SURVEY_SELECT_MULTIPLE_CODE:
-                    selections = sorted(list(set(map(int, a['selections']))))
-                    assert len(selections) > 0, 'There must be at least one option selected.'
-                    assert len(selections) <= len(q['options']), 'An option that does not exist.'
-                    assert selections[-1] < len(q['options']), 'An option that does not exist.'
-                    answer['selections'] = selections
-                else:
-                    assert False, f'{type} is a non-existent answer type.'
-                answer_data['answers'].append(answer)
-            assert len(answer_data['answers']) == len(quizzes_data), "Invalid response data exists."
-            # print(answer_data)
 
-            if user_uid is not None:
-                self.collection_answer.delete_one({'parent_post': ObjectId(pk), 'user': user_uid})
-            self.collection_answer.insert_one(answer_data)
+            old_answer_data = None
+            if user_uid is None:
+                self.collection_answer.insert_one(answer_data)
+            else:
+                # 한번의 upsert로 답변을 저장. 다시 답변한 경우 기존 문서를 그 자리에서 바꾸므로 답변이 사라지는 순간이 없다
+                # 바뀌기 전 문서를 돌려받아 집계에서 이전 답변만큼 뺀다
+                old_answer_data = self.collection_answer.find_one_and_update(
+                    {'parent_post': definition.id, 'user': user_uid},
+                    {
+                        '$set': {'answers': answer_data['answers']},
+                        '$setOnInsert': {'_id': answer_data['_id']}
+                    },
+                    projection={'answers': 1},
+                    upsert=True,
+                    return_document=ReturnDocument.BEFORE
+                )
+                if old_answer_data is not None:
+                    # 다시 답변한 경우 기존 답변의 id를 그대로 사용
+                    answer_data['_id'] = old_answer_data['_id']
+            apply_answer_tally(self.collections, definition.id, answer_data, old_answer_data)
+            bump_versions(survey_version(pk))
 
             answer_data['_id'] = str(answer_data['_id'])
             answer_data['parent_post'] = str(answer_data['parent_post'])
@@ -255,83 +231,187 @@ class SurveyViewSet(viewsets.ViewSet):
                     }
             return Response(detail, status=status.HTTP_400_BAD_REQUEST)
 
-    def list_post(self, request):
-        checked = request_check(request)
+    def create_answers_bulk(self, request, pk):
+        checked = request_check_admin_role(request)
         if isinstance(checked, Response):
-            # user role이 없다면 최하위 권한 적용
-            user_role_id = -1
-            user_uid = None
+            # 요청한 유저 정보가 없다면 500 return
+            return checked
+        user_uid, user_role_id, admin_role_checked = checked
+        if user_role_id >= admin_role_checked:
+            logger.debug(f'{user_uid} Answer bulk post approved')
+            try:
+                items = request.data['items']
+                assert isinstance(items, list) and len(items) > 0, 'There must be at least one answer.'
+                assert len(items) <= constant.SURVEY_BULK_MAX_SIZE, \
+                    f'No more than {constant.SURVEY_BULK_MAX_SIZE} answers can be submitted at once.'
+                definition = get_survey_definition(self.collections, pk)
+                assert definition is not None, 'Data does not exist.'
+
+                # 문항 정의는 캐시에서 한번만 가져오고, 각 답변은 mongo 조회 없이 검증
+                errors = []
+                answers_data = []  # (요청 내 index, 답변 문서)
+                users = set()
+                for idx, item in enumerate(items):
+                    try:
+                        answer_user = item.get('user')
+                        # 로그인한 유저는 uid 문자열, 익명 답변은 null
+                        assert answer_user is None or isinstance(answer_user, str), 'User must be a string or null.'
+                        assert answer_user is None or answer_user not in users, 'Duplicate user in request.'
+                        answers_data.append((idx, {
+                            'parent_post': definition.id,
+                            'user': answer_user,
+                            'answers': build_answers(definition, item['answers'])
+                        }))
+                        if answer_user is not None:
+                            users.add(answer_user)
+                    except Exception as e:
+                        errors.append({'index': idx, 'error': str(e)})
+
+                # 다시 답변하는 유저의 이전 답변은 집계에서 빼야 하므로 한번에 미리 가져옴
+                old_answers = {}
+                if users:
+                    for old_answer_data in self.collection_answer.find(
+                            {'parent_post': definition.id, 'user': {'$in': list(users)}},
+                            {'user': 1, 'answers': 1}):
+                        old_answers[old_answer_data['user']] = old_answer_data
+
+                # 로그인한 유저는 (parent_post, user)로 upsert, 익명 답변은 항상 새로 추가
+                operations = []
+                for _, answer_data in answers_data:
+                    if answer_data['user'] is None:
+                        operations.append(InsertOne(answer_data))
+                    else:
+                        operations.append(ReplaceOne(
+                            {'parent_post': definition.id, 'user': answer_data['user']},
+                            answer_data,
+                            upsert=True
+                        ))
+
+                failed = set()
+                if operations:
+                    try:
+                        self.collection_answer.bulk_write(operations, ordered=False)
+                    except BulkWriteError as bwe:
+                        # ordered=False 이므로 실패한 답변만 빼고 나머지는 저장된다
+                        for write_error in bwe.details.get('writeErrors', []):
+                            failed.add(write_error['index'])
+                            errors.append({
+                                'index': answers_data[write_error['index']][0],
+                                'error': write_error.get('errmsg', 'write failed')
+                            })
+
+                written = [a for i, (_, a) in enumerate(answers_data) if i not in failed]
+                replaced = [old_answers[a['user']] for a in written if a['user'] in old_answers]
+                if written:
+                    apply_answers_tally(self.collections, definition.id, written, replaced)
+                    bump_versions(survey_version(pk))
+
+                errors.sort(key=lambda e: e['index'])
+                response_data = {
+                    'created': len(written) - len(replaced),
+                    'updated': len(replaced),
+                    'errors': errors
+                }
+                if not written:
+                    # 하나도 저장되지 않았다면 실패로 응답하고, 답변별 에러를 그대로 돌려줌
+                    logger.info(f'{user_uid} Answer data bulk create failed\tparent post key: {pk}'
+                                f'\tfailed: {len(errors)}')
+                    return Response(response_data, status.HTTP_400_BAD_REQUEST)
+                logger.info(f'{user_uid} Answer data bulk created\tparent post key: {pk}'
+                            f'\tcreated: {response_data["created"]}\tupdated: {response_data["updated"]}'
+                            f'\tfailed: {len(errors)}')
+                return Response(response_data, status.HTTP_201_CREATED)
+            except Exception as e:
+                logger.error(f'create answers bulk failed.\n\terror: {e}')
+                detail = {
+                        "timestamp": datetime.datetime.now().isoformat(),
+
+                        "status": 400,
+
+                        "error": str(e),
+
+                        "code": "JGW_hub-survey-016",
+
+                        "message": "create answers bulk failed",
+
+                        "path": "/hub/api/v1/survey/"
+                    }
+                return Response(detail, status=status.HTTP_400_BAD_REQUEST)
         else:
-            user_uid, user_role_id = checked
+            logger.info(f"{user_uid} Answer bulk post denied")
+            detail = {
+                        "timestamp": datetime.datetime.now().isoformat(),
+
+                        "status": 403,
+
+                        "error": "Forbidden",
+
+                        "code": "JGW_hub-survey-017",
+
+                        "message": "Answer bulk post denied",
+
+                        "path": "/hub/api/v1/survey/"
+                    }
+            return Response(detail, status=status.HTTP_403_FORBIDDEN)
+
+    def list_post(self, request):
+        # user role이 없다면 최하위 권한 적용
+        context = get_auth_context(request)
+        user_uid, user_role_id = context.uid, context.effective_role
         logger.debug(f"Survey Post get request")
         try:
-            request.query_params._mutable = True
-
-            target_title = ''
+            # role은 $expr 대신 일반 조건으로 걸어야 index를 사용할 수 있음
+            match = {'role': {'$lte': user_role_id}}
             if 'title' in request.query_params:
-                target_title = request.query_paramsp['title']
-            aggregate_dict = [
-                {
-                    '$match': {
-                        '$expr': {
-                            '$and': [
-                                {'$lte': ['$role', user_role_id]}
-                            ]
-                        }
-                    }},
-                {'$match': {'title': {'$regex': target_title}}},
-                {
-                    '$sort': {
-                        'activate': -1,
-                        'created_time': -1
-                    }
-                },
-                {'$count': 'count'}
-            ]
-            print(list(self.collection_survey.aggregate(aggregate_dict)), user_role_id, target_title)
-            total_count = list(self.collection_survey.aggregate(aggregate_dict))
-            if total_count:
-                total_count = total_count[-1]['count']
-            else:
-                total_count = 0
-            del aggregate_dict[-1]
+                # 기존처럼 제목 중간에 포함되어도 검색. 입력값은 정규식이 아닌 문자열로 취급한다
+                match['title'] = {'$regex': re.escape(request.query_params['title'])}
 
+            page_size = constant.SURVEY_DEFAULT_PAGE_SIZE
             if 'page_size' in request.query_params:
                 # page size를 최소~최대 범위 안에서 지정
-                request.query_params['page_size'] = int(request.query_params['page_size'])
-                if request.query_params['page_size'] < constant.SURVEY_MIN_PAGE_SIZE:
-                    request.query_params['page_size'] = constant.SURVEY_MIN_PAGE_SIZE
-                elif request.query_params['page_size'] > constant.SURVEY_MAX_PAGE_SIZE:
-                    request.query_params['page_size'] = constant.SURVEY_MAX_PAGE_SIZE
-            else:
-                request.query_params['page_size'] = constant.SURVEY_DEFAULT_PAGE_SIZE
-
-            max_page = total_count // request.query_params['page_size']
-            max_page += 1 if total_count % request.query_params['page_size'] else 0
-            if 'page' not in request.query_params:
+                page_size = int(request.query_params['page_size'])
+                if page_size < constant.SURVEY_MIN_PAGE_SIZE:
+                    page_size = constant.SURVEY_MIN_PAGE_SIZE
+                elif page_size > constant.SURVEY_MAX_PAGE_SIZE:
+                    page_size = constant.SURVEY_MAX_PAGE_SIZE
+
+            page = 1
+            if 'page' in request.query_params:
                 # page를 지정하지 않으면 1로 지정
-                request.query_params['page'] = 1
-            else:
-                request.query_params['page'] = int(request.query_params['page'])
-                if request.query_params['page'] < 1:
-                    request.query_params['page'] = 1
-                elif max_page < request.query_params['page']:
-                    request.query_params['page'] = max_page
-
-            aggregate_dict.append({'$skip': (request.query_params['page'] - 1) * request.query_params['page_size']})
-            aggregate_dict.append({'$limit': request.query_params['page_size']})
-            page_now = self.collection_survey.aggregate(aggregate_dict)
-            page_now = list(page_now)
-
+                page = max(int(request.query_params['page']), 1)
+
+            def __aggregate_page(page):
+                # 전체 개수와 현재 페이지를 한번의 aggregate로 가져옴
+                result = list(self.collection_survey.aggregate([
+                    {'$match': match},
+                    {'$sort': {'activate': -1, 'created_time': -1}},
+                    {'$facet': {
+                        'total': [{'$count': 'count'}],
+                        'results': [
+                            {'$skip': (page - 1) * page_size},
+                            {'$limit': page_size}
+                        ]
+                    }}
+                ]))[0]
+                total_count = result['total'][0]['count'] if result['total'] else 0
+                return total_count, result['results']
+
+            total_count, page_now = __aggregate_page(page)
+            max_page = total_count // page_size
+            max_page += 1 if total_count % page_size else 0
+            if 0 < max_page < page:
+                # 마지막 페이지보다 큰 페이지를 요청한 경우에만 한번 더 조회
+                page = max_page
+                total_count, page_now = __aggregate_page(page)
+
+            base_url = request.build_absolute_uri().split('?')[0]
             response_data = {
                 'count': len(page_now),
                 'total_pages': max_page,
-                'next': request.build_absolute_uri().split('?')[0] +
-                        f'page={request.query_params["page"] + 1}&page_size={request.query_params["page_size"]}'
-                        if request.query_params['page'] < max_page else None,
-                'previous': request.build_absolute_uri().split('?')[0] +
-                            f'page={request.query_params["page"] - 1}&page_size={request.query_params["page_size"]}'
-                            if request.query_params['page'] > 1 else None,
+                'next': base_url + f'?page={page + 1}&page_size={page_size}'
+                        if page < max_page else None,
+                'previous': base_url + f'?page={page - 1}&page_size={page_size}'
+                            if page > 1 else None,
                 'results': []
             }
 
@@ -359,24 +439,20 @@ class SurveyViewSet(viewsets.ViewSet):
             return Response(detail, status=status.HTTP_400_BAD_REQUEST)
 
     def retrieve_post(self, request, pk):
-        checked = request_check(request)
-        if isinstance(checked, Response):
-            # user role이 없다면 최하위 권한 적용
-            user_role_id = -1
-            user_uid = None
-        else:
-            user_uid, user_role_id = checked
+        # user role이 없다면 최하위 권한 적용
+        context = get_auth_context(request)
+        user_uid, user_role_id = context.uid, context.effective_role
         try:
-            survey_data = self.collection_survey.find_one({'_id': ObjectId(pk)})
-            if survey_data is None: raise Http404('Data does not exist.')
+            definition = get_survey_definition(self.collections, pk)
+            if definition is None: raise Http404('Data does not exist.')
 
-            assert survey_data['role'] <= user_role_id, 'User is not a survey participant.'
+            assert definition.role <= user_role_id, 'User is not a survey participant.'
             logger.debug(f'{user_uid} Survey Post retrieve approved')
 
-            quizzes_data = self.collection_quiz.find(({'parent_post': ObjectId(pk)}))
-            quizzes_data = list(quizzes_data)
+            # 캐시된 정의는 공유되므로 복사해서 응답을 만듦
+            quizzes_data = [dict(q.doc) for q in definition.quizzes]
 
-            response_data = survey_data
+            response_data = dict(definition.doc)
             response_data['quizzes'] = []
             response_data['_id'] = str(response_data['_id'])
             response_data['created_time'] = response_data['created_time'].strftime(constant.TIME_QUERY)
@@ -432,7 +508,9 @@ class SurveyViewSet(viewsets.ViewSet):
             if 'analyze' in request.query_params and int(request.query_params['analyze']) == 1: # 분석 요청
                 logger.debug(f'{user_uid} Survey Answers list analyze request')
                 try:
-                    assert 'answer_id' in request.query_params, 'The id of the response to be analyzed is required.'
+                    if 'answer_id' not in request.query_params:
+                        # 문항을 지정하지 않으면 설문 전체 문항을 한번에 분석
+                        return self.__analyze_survey(request, pk)
                     answer_id = request.query_params['answer_id']
 
                     quiz_data = list(self.collection_quiz.aggregate([
@@ -491,92 +569,9 @@ class SurveyViewSet(viewsets.ViewSet):
                             'results': results
                         }
                         return Response(response_data, status=status.HTTP_200_OK)
-                    elif quiz_type == constant.SURVEY_SELECT_ONE_CODE:
-                        results = self.collection_quiz.aggregate([
-                            {'$match': {'_id': quiz_data['_id']}},
-                            {'$project': {'options': '$options.text'}},
-                            {'$unwind': {'path': '$options', 'includeArrayIndex': 'idx'}},
-                            {'$lookup': {
-                                'from': 'survey_answer',
-                                'let': {
-                                    'quiz_id': '$_id',
-                                    'quiz_idx': '$idx'
-                                },
-                                'pipeline': [
-                                    {'$unwind': '$answers'},
-                                    {'$match': {
-                                            '$expr': {
-                                                '$and': [
-                                                    {'$eq': ['$answers.parent_quiz', '$$quiz_id']},
-                                                    {'$eq': ['$answers.selection', '$$quiz_idx']}
-                                                ]
-                                            }
-                                        }
-                                    }, {
-                                        '$project': {
-                                            '_id': 0,
-                                            'answers': 1
-                                        }
-                                    }, {
-                                        '$count': 'selected'
-                                    }
-                                ],
-                                'as': 'aaa'}},
-                            {'$project': {
-                                '_id': 0,
-                                'text': '$options',
-                                'idx': 1,
-                                'count': {
-                                    '$cond': [{'$anyElementTrue': '$aaa.selected'},
-                                              {'$arrayElemAt': ['$aaa.selected', 0]}, 0]
-                                }}
-                            }
-                        ])
-                        results = list(results)
-                        return Response(results, status=status.HTTP_200_OK)
-                    elif quiz_type == constant.SURVEY_SELECT_MULTIPLE_CODE:
-                        results = self.collection_quiz.aggregate([
-                            {'$match': {'_id': quiz_data['_id']}},
-                            {'$project': {'options': '$options.text'}},
-                            {'$unwind': {'path': '$options', 'includeArrayIndex': 'idx'}},
-                            {'$lookup': {
-                                'from': 'survey_answer',
-                                'let': {
-                                    'quiz_id': '$_id',
-                                    'quiz_idx': '$idx'
-                                },
-                                'pipeline': [
-                                    {'$unwind': '$answers'},
-                                    {'$match': {
-                                            '$expr': {
-                                                '$and': [
-                                                    {'$eq': ['$answers.parent_quiz', '$$quiz_id']},
-                                                    {'$in': ['$$quiz_idx', '$answers.selections']}
-                                                ]
-                                            }
-                                        }
-                                    }, {
-                                        '$project': {
-                                            '_id': 0,
-                                            'answers': 1
-                                        }
-                                    }, {
-                                        '$count': 'selected',
-                                }
-                                ],
-                                'as': 'aaa'}},
-                            {'$project': {
-                                '_id': 0,
-                                'text': '$options',
-                                'idx': 1,
-                                'count': {
-                                    '$cond': [{'$anyElementTrue': '$aaa.selected'},
-                                              {'$arrayElemAt': ['$aaa.selected', 0]}, 0]
-                                }}
-                            }
-                        ])
-                        results = list(results)
-                        # print(results)
+                    elif quiz_type in (constant.SURVEY_SELECT_ONE_CODE, constant.SURVEY_SELECT_MULTIPLE_CODE):
+                        # 답변 저장 시점에 갱신된 선택지별 집계를 읽음
+                        results = read_option_tally(self.collections, quiz_data)
                         return Response(results, status=status.HTTP_200_OK)
                     else:
                         assert False, 'Error in question data.'
@@ -599,10 +594,7 @@ class SurveyViewSet(viewsets.ViewSet):
             else: # 사용자별 데이터 요청
                 logger.debug(f'{user_uid} Survey Answers list user request')
                 try:
-                    total_count = list(self.collection_answer.aggregate([
-                        {'$project': {'parent_post': ObjectId(pk)}},
-                        {'$count': 'answers'}
-                    ]))[0]['answers']
+                    total_count = get_answer_count(self.collections, ObjectId(pk))
 
                     page_size = constant.ANSWER_DEFAULT_PAGE_SIZE
                     if 'page_size' in request.query_params:
@@ -615,32 +607,59 @@ class SurveyViewSet(viewsets.ViewSet):
 
                     max_page = total_count // page_size
                     max_page += 1 if total_count % page_size else 0
-                    if 'page' not in request.query_params:
-                        # page를 지정하지 않으면 1로 지정
-                        page = 1
-                    else:
+                    base_url = request.build_absolute_uri().split('?')[0]
+
+                    if 'page' in request.query_params:
+                        # 이전 버전 호환용 page 방식. 뒷 페이지로 갈수록 느려진다
                         page = int(request.query_params['page'])
                         if page < 1:
                             page = 1
                         elif max_page < page:
                             page = max_page
 
-                    # print(page, page_size)
-
-                    target_answers = self.collection_answer.find({'parent_post': ObjectId(pk)}) \
-                        .skip((page - 1) * page_size) \
-                        .limit(page_size)
-                    target_answers = list(target_answers)
+                        target_answers = self.collection_answer.find({'parent_post': ObjectId(pk)}) \
+                            .sort('_id', 1) \
+                            .skip((max(page, 1) - 1) * page_size) \
+                            .limit(page_size)
+                        target_answers = list(target_answers)
+                        next_url = base_url + f'?page={page + 1}&page_size={page_size}' \
+                            if page < max_page else None
+                        previous_url = base_url + f'?page={page - 1}&page_size={page_size}' \
+                            if page > 1 else None
+                    else:
+                        # _id 기준 cursor 방식. (parent_post, _id) index로 몇번째 페이지든 같은 비용
+                        if 'before' in request.query_params:
+                            target_answers = self.collection_answer.find({
+                                'parent_post': ObjectId(pk),
+                                '_id': {'$lt': ObjectId(request.query_params['before'])}
+                            }).sort('_id', -1).limit(page_size + 1)
+                            target_answers = list(target_answers)
+                            has_previous = len(target_answers) > page_size
+                            target_answers = target_answers[:page_size][::-1]
+                            has_next = True
+                        else:
+                            answer_filter = {'parent_post': ObjectId(pk)}
+                            if 'cursor' in request.query_params:
+                                answer_filter['_id'] = {'$gt': ObjectId(request.query_params['cursor'])}
+                            target_answers = self.collection_answer.find(answer_filter) \
+                                .sort('_id', 1) \
+                                .limit(page_size + 1)
+                            target_answers = list(target_answers)
+                            has_next = len(target_answers) > page_size
+                            target_answers = target_answers[:page_size]
+                            has_previous = 'cursor' in request.query_params
+
+                        next_url = base_url + f'?cursor={target_answers[-1]["_id"]}&page_size={page_size}' \
+                            if has_next and target_answers else None
+                        previous_url = base_url + f'?before={target_answers[0]["_id"]}&page_size={page_size}' \
+                            if has_previous and target_answers else None
 
                     response_data = {
                         'count': len(target_answers),
+                        'total_count': total_count,
                         'total_pages': max_page,
-                        'next': request.build_absolute_uri().split('?')[0] +
-                                f'page={page + 1}&page_size={page_size}'
-                                if page < max_page else None,
-                        'previous': request.build_absolute_uri().split('?')[0] +
-                                    f'page={page - 1}&page_size={page_size}'
-                                    if page > 1 else None,
+                        'next': next_url,
+                        'previous': previous_url,
                         'results': []
                     }
 
@@ -684,6 +703,100 @@ class SurveyViewSet(viewsets.ViewSet):
                     }
             return Response(detail, status=status.HTTP_403_FORBIDDEN)
 
+    def __analyze_survey(self, request, pk):
+        page_size = constant.ANSWER_DEFAULT_PAGE_SIZE
+        if 'page_size' in request.query_params:
+            # page size를 최소~최대 범위 안에서 지정
+            page_size = int(request.query_params['page_size'])
+            if page_size < constant.ANSWER_MIN_PAGE_SIZE:
+                page_size = constant.ANSWER_MIN_PAGE_SIZE
+            elif page_size > constant.ANSWER_MAX_PAGE_SIZE:
+                page_size = constant.ANSWER_MAX_PAGE_SIZE
+        page = 1
+        if 'page' in request.query_params:
+            # 주관식 답변 페이지. 지정하지 않으면 1
+            page = max(int(request.query_params['page']), 1)
+
+        # 답변이 바뀌면 설문 version이 올라가므로 예전 분석 결과는 사용하지 않음
+        version = get_versions([survey_version(pk)])[survey_version(pk)]
+        key = f'{constant.SURVEY_ANALYSIS_CACHE_PREFIX}:{pk}:{version}:{page}:{page_size}'
+
+        def compute():
+            quizzes_data = list(self.collection_quiz.find({'parent_post': ObjectId(pk)}).sort('_id', 1))
+            assert len(quizzes_data) > 0, 'There are no questions.'
+            quizzes = analyze_survey(self.collections, ObjectId(pk), quizzes_data, page, page_size)
+            cache.set(key, quizzes, timeout=constant.SURVEY_ANALYSIS_CACHE_TTL)
+            return quizzes
+
+        # 여러 admin이 동시에 분석을 요청해도 aggregate는 한번만 실행하고 나머지는 그 결과를 사용
+        response_data = {
+            'parent_post': pk,
+            'page': page,
+            'page_size': page_size,
+            'quizzes': single_flight(key, lambda: cache.get(key), compute)
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    def export_answers(self, request, pk):
+        checked = request_check_admin_role(request)
+        if isinstance(checked, Response):
+            # 요청한 유저 정보가 없다면 500 return
+            return checked
+        user_uid, user_role_id, admin_role_checked = checked
+        if user_role_id >= admin_role_checked:
+            logger.debug(f'{user_uid} Survey Answers export approved')
+            try:
+                file_type = request.query_params.get('file_type', 'csv')
+                assert file_type in ('csv', 'ndjson'), f'{file_type} is a non-existent file type.'
+
+                # 문항 제목은 처음에 한번만 가져오고, 답변은 cursor로 읽으면서 바로 내보냄
+                quizzes_data = list(self.collection_quiz.find({'parent_post': ObjectId(pk)}).sort('_id', 1))
+                assert len(quizzes_data) > 0, 'There are no questions.'
+
+                if file_type == 'csv':
+                    rows = iter_answers_csv(self.collections, ObjectId(pk), quizzes_data)
+                    content_type = 'text/csv; charset=utf-8'
+                else:
+                    rows = iter_answers_ndjson(self.collections, ObjectId(pk), quizzes_data)
+                    content_type = 'application/x-ndjson; charset=utf-8'
+
+                response = StreamingHttpResponse(rows, content_type=content_type)
+                response['Content-Disposition'] = f'attachment; filename="survey_{pk}.{file_type}"'
+                logger.info(f'{user_uid} Survey Answers exported\tkey: {pk}\tfile type: {file_type}')
+                return response
+            except Exception as e:
+                logger.error(f'export survey answers failed.\n\terror: {e}')
+                detail = {
+                        "timestamp": datetime.datetime.now().isoformat(),
+
+                        "status": 400,
+
+                        "error": str(e),
+
+                        "code": "JGW_hub-survey-014",
+
+                        "message": "export survey answers failed",
+
+                        "path": "/hub/api/v1/survey/"
+                    }
+                return Response(detail, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            logger.info(f"{user_uid} Survey Answers export denied")
+            detail = {
+                        "timestamp": datetime.datetime.now().isoformat(),
+
+                        "status": 403,
+
+                        "error": "Forbidden",
+
+                        "code": "JGW_hub-survey-015",
+
+                        "message": "Survey Answers export denied",
+
+                        "path": "/hub/api/v1/survey/"
+                    }
+            return Response(detail, status=status.HTTP_403_FORBIDDEN)
+
     def delete_post(self, request, pk):
         checked = request_check_admin_role(request)
         if isinstance(checked, Response):
@@ -694,8 +807,11 @@ class SurveyViewSet(viewsets.ViewSet):
             logger.debug(f'{user_uid} Survey Post delete approved')
             try:
                 result_post = self.collection_survey.delete_one({'_id': ObjectId(pk)})
+                invalidate_survey_definition(pk)
                 result_quiz = self.collection_quiz.delete_many({'parent_post': ObjectId(pk)})
                 result_answer = self.collection_answer.delete_many({'parent_post': ObjectId(pk)})
+                self.collections.tally.delete_many({'parent_post': ObjectId(pk)})
+                bump_versions(survey_version(pk))
                 logger.debug(f'{user_uid} Survey Post data deleted\tkey: {pk}\tquiz count: {result_quiz.deleted_count}'
                              f'\tanswer count: {result_answer.deleted_count}')
                 return Response(status=status.HTTP_204_NO_CONTENT)
@@ -761,6 +877,7 @@ class SurveyViewSet(viewsets.ViewSet):
                     {'_id': ObjectId(pk)},
                     {'$set': update_data}
                 )
+                invalidate_survey_definition(pk)
                 after_patch = self.collection_survey.find_one({'_id': ObjectId(pk)})
 
                 update_log = f'{user_uid} Survey Post data patched' \